@@ -56,7 +56,9 @@ Examples:
 from __future__ import annotations
 
 import argparse
+import calendar
 import csv
+import functools
 import io
 import json
 import lzma
@@ -67,10 +69,11 @@ import subprocess
 import sys
 import time
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Iterator
+from typing import Callable, Iterator
 
 _T0 = time.monotonic()
 VERSION = "0.8.0"
@@ -82,6 +85,12 @@ _HISTORY_WINDOW = 600.0  # 10 minutes
 
 DEFAULT_LOG_DIR = Path("/tmp/claude/observatory")
 
+# --jobs: below this many input bytes, process startup costs more than it saves
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+
+# Filter mode writes rows to the binary stdout buffer, flushing every N rows
+OUTPUT_FLUSH_ROWS = 4096
+
 # Events we track for state derivation (all meaningful hook events)
 TRACKED_EVENTS = {
     "SessionStart",
@@ -445,26 +454,48 @@ def project_name(path: str) -> str:
     return parts[-1] if parts else "?"
 
 
-def time_ago(ts_str: str) -> str:
-    """Human-readable time since timestamp (e.g. '5m ago', '2h ago')."""
+@functools.lru_cache(maxsize=4096)
+def ts_epoch(ts_str: str) -> int:
+    """Convert an ISO timestamp to integer epoch seconds. Returns 0 on parse failure.
+
+    Observatories always emit 'YYYY-MM-DDTHH:MM:SS+00:00', so that shape is
+    sliced straight into integers; anything else (other offsets, fractional
+    seconds, naive times) goes through datetime.fromisoformat. Comparing these
+    ints is both faster and correct across mixed timezone suffixes, unlike
+    comparing the raw strings. Cached: each session's _ts is used for sorting
+    and again for the 'ago' column.
+    """
+    if not ts_str:
+        return 0
     try:
-        # Parse ISO timestamp (with or without timezone)
+        if len(ts_str) == 25 and ts_str.endswith("+00:00"):
+            return calendar.timegm((
+                int(ts_str[0:4]), int(ts_str[5:7]), int(ts_str[8:10]),
+                int(ts_str[11:13]), int(ts_str[14:16]), int(ts_str[17:19]),
+            ))
         ts = datetime.fromisoformat(ts_str)
         if ts.tzinfo is None:
             ts = ts.replace(tzinfo=timezone.utc)
-        delta = datetime.now(timezone.utc) - ts
-        secs = int(delta.total_seconds())
-        if secs < 0:
-            return "just now"
-        if secs < 60:
-            return f"{secs}s ago"
-        if secs < 3600:
-            return f"{secs // 60}m ago"
-        if secs < 86400:
-            return f"{secs // 3600}h {(secs % 3600) // 60}m ago"
-        return f"{secs // 86400}d ago"
+        return int(ts.timestamp())
     except (ValueError, TypeError):
+        return 0
+
+
+def time_ago(ts_str: str) -> str:
+    """Human-readable time since timestamp (e.g. '5m ago', '2h ago')."""
+    epoch = ts_epoch(ts_str)
+    if not epoch:
         return "?"
+    secs = int(time.time()) - epoch
+    if secs < 0:
+        return "just now"
+    if secs < 60:
+        return f"{secs}s ago"
+    if secs < 3600:
+        return f"{secs // 60}m ago"
+    if secs < 86400:
+        return f"{secs // 3600}h {(secs % 3600) // 60}m ago"
+    return f"{secs // 86400}d ago"
 
 
 def get_claude_pid_cwd_map() -> dict[int, str]:
@@ -661,76 +692,147 @@ def _is_tracked_event(event: dict) -> bool:
     return True
 
 
-def run_waiting(args: argparse.Namespace, sources: list[Path] | None) -> None:
-    """Handle --waiting mode: show session states."""
-    mode = args.waiting  # "recent" or "all"
-    without_dead = getattr(args, "without_dead", False)
-    verbose = getattr(args, "verbose", 0) or 0
+def _scan_sessions(
+    lines: Iterator[str], mode: str,
+) -> tuple[dict[str, dict], list[dict], int]:
+    """Parse JSONL lines into per-session records (and waiting history for mode=all).
 
-    # Per-session tracking
+    Returns (sessions, all_waiting, line_count). Used directly for sequential
+    scans and per-file by --jobs workers, whose results _merge_sessions() folds.
+    """
     sessions: dict[str, dict] = {}
     all_waiting: list[dict] = []
-
-    t_parse = time.monotonic()
     line_count = 0
-    for line in iter_lines(sources):
-        line = line.strip()
-        if not line or line[0] != "{":
+    collect_waiting = mode == "all"
+
+    # Hot loop: bind globals and methods to locals once (LOAD_FAST vs. LOAD_GLOBAL
+    # + attribute lookup per line adds up over large histories)
+    loads = json.loads
+    decode_error = json.JSONDecodeError
+    is_tracked = _is_tracked_event
+    reason_fn = state_reason
+    project = project_name
+    append_waiting = all_waiting.append
+    waiting_events = ("Stop", "PermissionRequest", "Notification")
+
+    for line in lines:
+        # No strip() on the common path: json.loads ignores surrounding
+        # whitespace, and slicing the first char avoids a stripped copy of
+        # every line; only lines failing that check pay for lstrip()
+        if line[:1] != "{" and line.lstrip()[:1] != "{":
             continue
         try:
-            event = json.loads(line)
-        except json.JSONDecodeError:
+            event = loads(line)
+        except decode_error:
             continue
 
         line_count += 1
-        sid = event.get("session_id", "")
+        get = event.get
+        sid = get("session_id", "")
         if not sid:
             continue
 
-        ts = event.get("_ts", "")
-        etype = event.get("_event", "")
+        etype = get("_event", "")
+        cwd = get("cwd", "")
 
         # Initialize session record
-        if sid not in sessions:
-            sessions[sid] = {
+        rec = sessions.get(sid)
+        if rec is None:
+            rec = sessions[sid] = {
                 "last_event": None,
                 "last_event_type": "",
                 "terminated": False,
-                "start_cwd": event.get("cwd", ""),  # launch CWD (for /proc matching)
-                "cwd": event.get("cwd", ""),         # latest CWD (for display)
+                "start_cwd": cwd,          # launch CWD (for /proc matching)
+                "cwd": cwd,                # latest CWD (for display)
+                "start_cwd_final": False,  # set by SessionStart (for merging)
             }
 
-        rec = sessions[sid]
-        # Always update display cwd to latest
-        if event.get("cwd"):
-            rec["cwd"] = event["cwd"]
-        # Capture start_cwd from SessionStart (most reliable for /proc match)
-        if etype == "SessionStart" and event.get("cwd"):
-            rec["start_cwd"] = event["cwd"]
+        if cwd:
+            # Always update display cwd to latest
+            rec["cwd"] = cwd
+            # Capture start_cwd from SessionStart (most reliable for /proc match)
+            if etype == "SessionStart":
+                rec["start_cwd"] = cwd
+                rec["start_cwd_final"] = True
 
         if etype == "SessionEnd":
             rec["terminated"] = True
             rec["last_event"] = event
             rec["last_event_type"] = etype
-        elif _is_tracked_event(event):
+        elif is_tracked(event):
             rec["last_event"] = event
             rec["last_event_type"] = etype
 
             # For --waiting=all mode, collect waiting events
-            if mode == "all" and etype in ("Stop", "PermissionRequest", "Notification"):
+            if collect_waiting and etype in waiting_events:
                 enriched = {
-                    "_ts": ts,
+                    "_ts": get("_ts", ""),
                     "_event": etype,
                     "session_id": sid,
-                    "reason": state_reason(event, ""),
-                    "cwd": event.get("cwd", ""),
-                    "project": project_name(event.get("cwd", "")),
-                    "tool_name": event.get("tool_name"),
-                    "notification_type": event.get("notification_type"),
-                    "message": event.get("message"),
+                    "reason": reason_fn(event, ""),
+                    "cwd": cwd,
+                    "project": project(cwd),
+                    "tool_name": get("tool_name"),
+                    "notification_type": get("notification_type"),
+                    "message": get("message"),
                 }
-                enriched = {k: v for k, v in enriched.items() if v is not None}
-                all_waiting.append(enriched)
+                append_waiting({k: v for k, v in enriched.items() if v is not None})
+
+    return sessions, all_waiting, line_count
+
+
+def _merge_sessions(merged: dict[str, dict], later: dict[str, dict]) -> None:
+    """Fold session records from a later file into merged (in place).
+
+    Produces the same result as scanning both files sequentially: latest
+    non-empty cwd wins, SessionStart cwd wins over first-seen cwd, and
+    termination is sticky.
+    """
+    for sid, rec in later.items():
+        cur = merged.get(sid)
+        if cur is None:
+            merged[sid] = rec
+            continue
+        if rec["cwd"]:
+            cur["cwd"] = rec["cwd"]
+        if rec["start_cwd_final"]:
+            cur["start_cwd"] = rec["start_cwd"]
+            cur["start_cwd_final"] = True
+        if rec["last_event"] is not None:
+            cur["last_event"] = rec["last_event"]
+            cur["last_event_type"] = rec["last_event_type"]
+        cur["terminated"] = cur["terminated"] or rec["terminated"]
+
+
+def _scan_sessions_file(path: Path, mode: str) -> tuple[dict[str, dict], list[dict], int, float]:
+    """--jobs worker: scan one log file. Runs in a child process."""
+    t_file = time.monotonic()
+    sessions, all_waiting, line_count = _scan_sessions(_iter_file(path), mode)
+    return sessions, all_waiting, line_count, time.monotonic() - t_file
+
+
+def run_waiting(args: argparse.Namespace, sources: list[Path] | None) -> None:
+    """Handle --waiting mode: show session states."""
+    mode = args.waiting  # "recent" or "all"
+    without_dead = getattr(args, "without_dead", False)
+    verbose = getattr(args, "verbose", 0) or 0
+
+    t_parse = time.monotonic()
+    jobs = _parallel_jobs(args, sources)
+    if jobs > 1:
+        # Files are independent: scan each in a worker, then reduce in order
+        sessions: dict[str, dict] = {}
+        all_waiting: list[dict] = []
+        line_count = 0
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = pool.map(_scan_sessions_file, sources, [mode] * len(sources))
+            for path, (file_sessions, file_waiting, file_lines, elapsed) in zip(sources, results):
+                _merge_sessions(sessions, file_sessions)
+                all_waiting.extend(file_waiting)
+                line_count += file_lines
+                _timings[f"file:{path.name}"] = elapsed
+    else:
+        sessions, all_waiting, line_count = _scan_sessions(iter_lines(sources), mode)
 
     _timings["log_parse"] = time.monotonic() - t_parse
     _timings["log_lines"] = line_count
@@ -1040,7 +1142,7 @@ def _output_sessions(
     t_state = time.monotonic()
     sorted_sids = sorted(
         sessions.keys(),
-        key=lambda s: _ts_sortval(
+        key=lambda s: ts_epoch(
             (sessions[s]["last_event"] or {}).get("_ts", "")
         ),
         reverse=True,
@@ -1109,9 +1211,7 @@ def _output_sessions(
         return
 
     # Sort: by state group, then by timestamp descending within each group
-    records.sort(key=lambda r: (_state_sort_key(r["state"]), -(
-        _ts_sortval(r["_ts"])
-    )))
+    records.sort(key=lambda r: (_state_sort_key(r["state"]), -ts_epoch(r["_ts"])))
 
     if jsonl:
         for rec in records:
@@ -1154,17 +1254,6 @@ def _output_sessions(
         _print_verbose_stats(verbose)
 
 
-def _ts_sortval(ts_str: str) -> float:
-    """Convert timestamp to float for sorting. Returns 0.0 on parse failure."""
-    try:
-        ts = datetime.fromisoformat(ts_str)
-        if ts.tzinfo is None:
-            ts = ts.replace(tzinfo=timezone.utc)
-        return ts.timestamp()
-    except (ValueError, TypeError):
-        return 0.0
-
-
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Query observatory logs by hook event type.",
@@ -1273,6 +1362,16 @@ def parse_args() -> argparse.Namespace:
         help="Also read archived sessions from archive/*.finished.jsonl.xz. "
         "Useful with --waiting=all for historical queries.",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="Scan log files in N parallel processes (default: CPU count). "
+        "Only used for multiple files totalling 16+ MB; --last and stdin "
+        "are always sequential.",
+    )
     parser.add_argument(
         "--watch",
         nargs="?",
@@ -1311,6 +1410,19 @@ def discover_log_files(include_archived: bool = False) -> list[Path]:
     return archived + rotated + current  # archived first, then oldest rotated, current last
 
 
+def _iter_file(path: Path) -> Iterator[str]:
+    """Yield lines from one log file, decompressing .xz transparently."""
+    try:
+        if path.name.endswith(".xz"):
+            with lzma.open(path, "rt") as f:
+                yield from f
+        else:
+            with open(path) as f:
+                yield from f
+    except FileNotFoundError:
+        print(f"Warning: {path} not found, skipping.", file=sys.stderr)
+
+
 def iter_lines(sources: list[Path] | None) -> Iterator[str]:
     """Yield lines from files or stdin, one at a time (streaming).
 
@@ -1319,20 +1431,32 @@ def iter_lines(sources: list[Path] | None) -> Iterator[str]:
     if sources:
         for path in sources:
             t_file = time.monotonic()
-            try:
-                if path.name.endswith(".xz"):
-                    with lzma.open(path, "rt") as f:
-                        yield from f
-                else:
-                    with open(path) as f:
-                        yield from f
-            except FileNotFoundError:
-                print(f"Warning: {path} not found, skipping.", file=sys.stderr)
+            yield from _iter_file(path)
             _timings[f"file:{path.name}"] = time.monotonic() - t_file
     else:
         yield from sys.stdin
 
 
+def _parallel_jobs(args: argparse.Namespace, sources: list[Path] | None) -> int:
+    """Number of worker processes for this scan (1 = sequential).
+
+    Parallel scanning only pays off when there are several files and enough
+    bytes to amortize process startup, so small inputs stay sequential.
+    """
+    jobs = getattr(args, "jobs", None) or 1
+    if jobs <= 1 or not sources or len(sources) < 2:
+        return 1
+    total = 0
+    for path in sources:
+        try:
+            total += path.stat().st_size
+        except OSError:
+            pass
+    if total < PARALLEL_MIN_BYTES:
+        return 1
+    return min(jobs, len(sources))
+
+
 def matches(event: dict, args: argparse.Namespace) -> bool:
     """Check if an event matches all active filters."""
     if args.events and event.get("_event") not in args.events:
@@ -1353,6 +1477,62 @@ def format_event(event: dict, jsonl: bool) -> str:
     return json.dumps(event, indent=2)
 
 
+def filter_events(lines: Iterator[str], args: argparse.Namespace) -> Iterator[dict]:
+    """Parse JSONL lines and yield events passing all filters (streaming).
+
+    With --columns, yields only the selected keys of each event.
+    """
+    for line in lines:
+        if line[:1] != "{" and line.lstrip()[:1] != "{":
+            continue  # fast skip non-JSON lines (YAML separators, etc.)
+        try:
+            event = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not matches(event, args):
+            continue
+        # --columns in filter mode: select specific keys
+        if args._columns:
+            event = {k: event[k] for k in args._columns if k in event}
+        yield event
+
+
+def _filter_file(path: Path, args: argparse.Namespace) -> tuple[list[str], float]:
+    """--jobs worker: filter and format one log file. Runs in a child process."""
+    t_file = time.monotonic()
+    out = [format_event(event, args.jsonl) for event in filter_events(_iter_file(path), args)]
+    return out, time.monotonic() - t_file
+
+
+def stdout_writer() -> tuple[Callable[[str], None], Callable[[], None]]:
+    """Return (emit, flush) for writing many output lines to stdout.
+
+    emit() writes encoded bytes straight to the binary buffer under
+    sys.stdout, skipping print()'s per-call text-layer overhead, and flushes
+    every OUTPUT_FLUSH_ROWS rows so pipes still see steady progress. Falls
+    back to print() when stdout has no binary buffer (--watch captures
+    output in a StringIO).
+    """
+    buf = getattr(sys.stdout, "buffer", None)
+    if buf is None:
+        return print, lambda: None
+    sys.stdout.flush()  # anything already printed must come first
+    write = buf.write
+    newline = b"\n"
+    rows = 0
+
+    def emit(text: str) -> None:
+        nonlocal rows
+        write(text.encode())
+        write(newline)
+        rows += 1
+        if rows == OUTPUT_FLUSH_ROWS:
+            buf.flush()
+            rows = 0
+
+    return emit, buf.flush
+
+
 def resolve_sources(args: argparse.Namespace) -> list[Path] | None:
     """Determine input sources: explicit --file > auto-discovered logs > stdin."""
     if args.file:
@@ -1417,28 +1597,28 @@ def _run_once(args: argparse.Namespace) -> None:
     use_tail = args.last and args.last > 0
     tail: deque[dict] = deque(maxlen=args.last) if use_tail else deque()
 
-    for line in iter_lines(sources):
-        line = line.strip()
-        if not line or line[0] != "{":
-            continue  # fast skip non-JSON lines (YAML separators, etc.)
-        try:
-            event = json.loads(line)
-        except json.JSONDecodeError:
-            continue
-        if not matches(event, args):
-            continue
-        # --columns in filter mode: select specific keys
-        if args._columns:
-            event = {k: event[k] for k in args._columns if k in event}
-        if use_tail:
-            tail.append(event)
-        else:
-            print(format_event(event, args.jsonl))
+    emit, flush = stdout_writer()
+    jobs = 1 if use_tail else _parallel_jobs(args, sources)
+    if jobs > 1:
+        # Files are independent: format each in a worker, print in file order
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = pool.map(_filter_file, sources, [args] * len(sources))
+            for path, (formatted, elapsed) in zip(sources, results):
+                for text in formatted:
+                    emit(text)
+                _timings[f"file:{path.name}"] = elapsed
+    else:
+        for event in filter_events(iter_lines(sources), args):
+            if use_tail:
+                tail.append(event)
+            else:
+                emit(format_event(event, args.jsonl))
 
     # Flush tail buffer
     if use_tail:
         for event in tail:
-            print(format_event(event, args.jsonl))
+            emit(format_event(event, args.jsonl))
+    flush()
 
     if not args.no_stats:
         parts = []
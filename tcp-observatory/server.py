@@ -1,7 +1,7 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.10"
-# dependencies = ["pyyaml", "pygments"]
+# dependencies = ["pyyaml", "pygments", "orjson"]
 # ///
 """
 Claude Code Hooks Observatory - Server
@@ -25,26 +25,45 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import io
 import json
 import os
+import signal
 import sys
-from datetime import datetime, timezone
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Any
-from urllib.parse import parse_qs, urlparse
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Any, Callable
+from urllib.parse import unquote_plus
 
 import yaml
 from pygments import highlight
 from pygments.lexers import YamlLexer
 from pygments.formatters import Terminal256Formatter
 
+try:
+    import orjson
+except ImportError:  # plain `python server.py` without uv: stdlib json works too
+    orjson = None
+
 DEFAULT_PORT = 23518
 DEFAULT_BIND = "127.0.0.1"
 ENV_PORT = "CLAUDE_REST_HOOK_WATCHER"
+ENV_HTTP_LOG = "CLAUDE_HTTP_LOG"
+STDOUT_BUFFER_SIZE = 64 * 1024
+FLUSH_INTERVAL = 0.05  # max seconds piped output waits in the buffer
+
+# Requests are handled on worker threads; one writer at a time keeps each
+# event's bytes contiguous on stdout.
+_stdout_lock = threading.Lock()
+
+# Flush after every event (terminal) or leave it to the flusher thread (pipe).
+# Set in main() by buffer_stdout_if_piped().
+_flush_each_event = True
 
-# Module-level output mode (set from CLI args in main)
-# Values: "jsonl" (default), "pretty-json", "pretty-yaml"
-_output_mode = "jsonl"
+# Set by write_stdout() when buffered bytes are waiting; the flusher thread
+# sleeps on it, so an idle server never wakes up.
+_output_pending = threading.Event()
 
 
 class _MultilineYamlDumper(yaml.SafeDumper):
@@ -60,14 +79,85 @@ def _str_representer(dumper: yaml.SafeDumper, data: str) -> yaml.Node:
 
 _MultilineYamlDumper.add_representer(str, _str_representer)
 
+# Built once: constructing a pygments lexer/formatter per event is expensive.
+_YAML_LEXER = YamlLexer()
+_YAML_FORMATTER = Terminal256Formatter()
+
+# Whether stdout is a terminal; checked once in main() (stdout doesn't change
+# mid-run). Decides YAML highlighting and the per-event flush.
+_IS_TTY = False
+
+
+def json_loads(body: bytes) -> Any:
+    """Parse JSON bytes (orjson when available; both raise json.JSONDecodeError)."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def json_bytes(data: Any, indent: bool = False, newline: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes: compact, or 2-space indented.
+
+    newline=True appends the line terminator during serialization (orjson's
+    OPT_APPEND_NEWLINE), saving a copy of every output line.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(data, option=option)
+    if indent:
+        text = json.dumps(data, indent=2)
+    else:
+        text = json.dumps(data, separators=(",", ":"))
+    return (text + "\n" if newline else text).encode()
+
+
+# (epoch second, formatted) for the last timestamp handed out. Replaced as a
+# whole tuple, so worker threads never see a half-updated pair.
+_ts_cache: tuple[int, str] = (-1, "")
+
 
 def get_timestamp() -> str:
-    """Return current UTC timestamp in ISO format."""
-    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+    """Return current UTC timestamp in ISO format (second resolution).
+
+    Events in a burst share a wall-clock second, so the string is built
+    once per second rather than via datetime on every call.
+    """
+    global _ts_cache
+    sec = int(time.time())
+    cached_sec, text = _ts_cache
+    if sec != cached_sec:
+        t = time.gmtime(sec)
+        text = "%04d-%02d-%02dT%02d:%02d:%02d+00:00" % t[:6]
+        _ts_cache = (sec, text)
+    return text
+
+
+def parse_event(path: str) -> str:
+    """Extract the `event` query parameter from a request path.
+
+    Hook URLs always look like /hook?event=PreToolUse, so this slices the
+    value out directly instead of building urlparse/parse_qs structures.
+    Returns "Unknown" when the parameter is missing or empty.
+    """
+    i = path.find("?event=")
+    if i < 0:
+        i = path.find("&event=")
+        if i < 0:
+            return "Unknown"
+    event = path[i + 7:].partition("&")[0]
+    if "%" in event or "+" in event:
+        event = unquote_plus(event)
+    return event or "Unknown"
 
 
 def enrich_payload(payload: dict[str, Any], event: str, client: str) -> dict[str, Any]:
-    """Add metadata fields (prefixed with _) to the payload."""
+    """Add metadata fields (prefixed with _) to the payload.
+
+    Returns a new dict so the metadata comes first; in-place updates could
+    only append it.
+    """
     return {
         "_ts": get_timestamp(),
         "_event": event,
@@ -76,79 +166,163 @@ def enrich_payload(payload: dict[str, Any], event: str, client: str) -> dict[str
     }
 
 
+def _emit_jsonl(data: dict[str, Any]) -> None:
+    """Write one compact JSON line (the default format)."""
+    write_stdout(json_bytes(data, newline=True))
+
+
+def _emit_pretty_json(data: dict[str, Any]) -> None:
+    """Write indented multi-line JSON."""
+    write_stdout(json_bytes(data, indent=True, newline=True))
+
+
+def _emit_pretty_yaml(data: dict[str, Any]) -> None:
+    """Write a YAML document, syntax-highlighted on a terminal."""
+    yaml_text = yaml.dump(
+        data, Dumper=_MultilineYamlDumper,
+        default_flow_style=False, sort_keys=False,
+    )
+    if _IS_TTY:
+        text = "\033[90m---\033[0m\n" + highlight(
+            yaml_text, _YAML_LEXER, _YAML_FORMATTER)
+    else:
+        text = "---\n" + yaml_text
+    write_stdout(text.encode())
+
+
+# The output formatter, chosen once in main() from CLI args so the per-event
+# path is a direct call rather than a dispatch on the mode.
+_emit: Callable[[dict[str, Any]], None] = _emit_jsonl
+
+
 def output_event(data: dict[str, Any]) -> None:
     """Output a single event to stdout in the configured format."""
-    match _output_mode:
-        case "pretty-yaml":
-            yaml_text = yaml.dump(
-                data, Dumper=_MultilineYamlDumper,
-                default_flow_style=False, sort_keys=False,
-            )
-            if sys.stdout.isatty():
-                print("\033[90m---\033[0m")
-                print(highlight(yaml_text, YamlLexer(), Terminal256Formatter()),
-                      end="", flush=True)
-            else:
-                print("---")
-                print(yaml_text, end="", flush=True)
-        case "pretty-json":
-            print(json.dumps(data, indent=2), flush=True)
-        case _:
-            print(json.dumps(data, separators=(",", ":")), flush=True)
+    _emit(data)
+
+
+def write_stdout(data: bytes) -> None:
+    """Write encoded bytes to stdout, skipping print()'s text-layer encode."""
+    out = sys.stdout.buffer
+    with _stdout_lock:
+        out.write(data)
+        if _flush_each_event:
+            out.flush()
+        else:
+            _output_pending.set()
+
+
+def flush_stdout() -> None:
+    """Flush whatever the stdout buffer is holding."""
+    with _stdout_lock:
+        sys.stdout.buffer.flush()
+
+
+def _flush_when_pending() -> None:
+    """Flusher thread body: wait for output, let the burst collect, flush.
+
+    Clearing the event before flushing means a write that races the flush
+    just sets it again and gets its own flush on the next pass.
+    """
+    while True:
+        _output_pending.wait()
+        time.sleep(FLUSH_INTERVAL)
+        _output_pending.clear()
+        flush_stdout()
+
+
+def buffer_stdout_if_piped() -> None:
+    """Batch stdout writes when it isn't a terminal.
+
+    A pipe or file consumer doesn't need each event the instant it arrives,
+    so events collect in a 64 KB buffer and a daemon thread flushes it at
+    most 50 ms after the first pending write: one write() syscall per burst
+    instead of one per event, and no wakeups while the server is idle. On a
+    terminal every event is still flushed immediately.
+    """
+    global _flush_each_event
+    if _IS_TTY:
+        return
+    sys.stdout.flush()
+    sys.stdout = io.TextIOWrapper(
+        open(sys.stdout.fileno(), "wb", buffering=STDOUT_BUFFER_SIZE, closefd=False),
+        encoding="utf-8",
+    )
+    _flush_each_event = False
+    threading.Thread(target=_flush_when_pending, daemon=True).start()
 
 
 class HookHandler(BaseHTTPRequestHandler):
     """HTTP request handler for hook events."""
 
+    # HTTP/1.1 lets a client reuse one connection for a burst of hooks
+    # (every response carries Content-Length, so framing is unambiguous).
+    # A kept-alive connection idles on its worker thread until the peer
+    # closes, so reap it after 5 seconds of silence.
+    protocol_version = "HTTP/1.1"
+    timeout = 5
+
+    # Canned responses: one wfile.write() instead of send_response/send_header
+    # formatting (status line, Server and Date headers) on every request.
+    _OK_EMPTY = (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: 0\r\n\r\n"
+    )
+    _NOT_FOUND = b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n"
+    _HEALTH_RESPONSE = (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: 15\r\n\r\n"
+        b'{"status":"ok"}'
+    )
+
+    # A "[HTTP] ..." line per request is one more stderr write per hook;
+    # opt in with CLAUDE_HTTP_LOG=1. Errors (log_error) are always logged.
+    _log_requests = bool(os.environ.get(ENV_HTTP_LOG))
+
     def log_message(self, format: str, *args: Any) -> None:
         """Redirect HTTP logs to stderr to keep stdout clean for JSONL."""
-        sys.stderr.write(f"[HTTP] {args[0]} {args[1]} {args[2]}\n")
+        sys.stderr.write(f"[HTTP] {' '.join(map(str, args))}\n")
+
+    def log_request(self, code: int | str = "-", size: int | str = "-") -> None:
+        """Log the request line only when CLAUDE_HTTP_LOG is set."""
+        if self._log_requests:
+            super().log_request(code, size)
 
     def do_POST(self) -> None:
         """Handle POST /hook?event=<EventType> requests."""
-        # Parse URL and query params
-        parsed = urlparse(self.path)
-        query = parse_qs(parsed.query)
-
         # Extract event type from query param
-        event = query.get("event", ["Unknown"])[0]
+        event = parse_event(self.path)
 
         # Read request body
         content_length = int(self.headers.get("Content-Length", 0))
         body = self.rfile.read(content_length)
 
+        # Get client address
+        client = self.client_address[0]
+
         # Parse JSON payload
         try:
-            payload = json.loads(body) if body else {}
-        except json.JSONDecodeError:
+            payload = json_loads(body) if body else {}
+        except ValueError:  # JSONDecodeError, or invalid UTF-8 under stdlib json
             payload = {"_raw": body.decode("utf-8", errors="replace")}
 
-        # Get client address
-        client = self.client_address[0]
-
-        # Enrich and output JSONL
+        # Enrich and output in the configured format
         enriched = enrich_payload(payload, event, client)
-        output_event(enriched)
+        _emit(enriched)
 
         # Return empty 200 (no-op response)
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", "0")
-        self.end_headers()
+        self.wfile.write(self._OK_EMPTY)
+        self.log_request(200)
 
     def do_GET(self) -> None:
         """Handle GET requests (health check)."""
         if self.path == "/health":
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            response = json.dumps({"status": "ok"})
-            self.send_header("Content-Length", str(len(response)))
-            self.end_headers()
-            self.wfile.write(response.encode())
+            self.wfile.write(self._HEALTH_RESPONSE)
+            self.log_request(200)
         else:
-            self.send_response(404)
-            self.send_header("Content-Length", "0")
-            self.end_headers()
+            self.wfile.write(self._NOT_FOUND)
+            self.log_request(404)
 
 
 def parse_args() -> argparse.Namespace:
@@ -209,32 +383,46 @@ def get_port(cli_port: int | None) -> int:
     return DEFAULT_PORT
 
 
+def _raise_keyboard_interrupt(signum: int, frame: Any) -> None:
+    """SIGTERM handler: unwind like Ctrl+C."""
+    raise KeyboardInterrupt
+
+
 def main() -> None:
     """Start the observatory server."""
-    global _output_mode
+    global _emit, _IS_TTY
     args = parse_args()
     port = get_port(args.port)
     bind = args.bind
     if args.pretty_yaml:
-        _output_mode = "pretty-yaml"
+        _emit = _emit_pretty_yaml
     elif args.pretty_json:
-        _output_mode = "pretty-json"
+        _emit = _emit_pretty_json
+    _IS_TTY = sys.stdout.isatty()
+    buffer_stdout_if_piped()
 
     # Increase listen backlog from default 5 to 128 so parallel hooks
     # (e.g., from subagents) queue in the kernel instead of being refused.
-    HTTPServer.request_queue_size = 128
-    server = HTTPServer((bind, port), HookHandler)
+    # Each accepted connection gets its own daemon thread, so a slow client
+    # no longer holds up everyone queued behind it.
+    ThreadingHTTPServer.request_queue_size = 128
+    server = ThreadingHTTPServer((bind, port), HookHandler)
 
     # Startup message to stderr (keeps stdout clean for JSONL)
     sys.stderr.write(f"Claude Code Hooks Observatory listening on {bind}:{port}\n")
     sys.stderr.write("Press Ctrl+C to stop\n")
     sys.stderr.write("\n")
 
+    # SIGTERM takes the same exit path as Ctrl+C so buffered events are flushed.
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
     try:
         server.serve_forever()
     except KeyboardInterrupt:
         sys.stderr.write("\nShutting down...\n")
         server.shutdown()
+    finally:
+        flush_stdout()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+#!/usr/bin/env -S uv run --script
+# /// script
+# requires-python = ">=3.10"
+# dependencies = ["pytest"]
+# ///
+"""
+Claude Code Hooks Observatory - Installer Tests
+
+Tests the settings merge and write path of install-hooks.py against
+temporary settings files, never the real ~/.claude/settings.json.
+
+Usage:
+    uv run --script test_install_hooks.py        # Run all tests
+    uv run --script test_install_hooks.py -v     # Verbose output
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import stat
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+# install-hooks.py isn't an importable module name, so load it by path
+_spec = importlib.util.spec_from_file_location(
+    "install_hooks", os.path.join(os.path.dirname(__file__), "install-hooks.py")
+)
+install_hooks = importlib.util.module_from_spec(_spec)  # type: ignore[arg-type]
+_spec.loader.exec_module(install_hooks)  # type: ignore[union-attr]
+
+
+def observatory_hooks() -> dict[str, Any]:
+    """Hook config the installer generates for the default server address."""
+    return install_hooks.generate_hook_config(23518, "127.0.0.1")
+
+
+def existing_settings() -> dict[str, Any]:
+    """A fresh settings dict that already has a hook of its own."""
+    return {
+        "model": "opus",
+        "hooks": {"Stop": [{"hooks": [{"type": "command", "command": "notify-send done"}]}]},
+    }
+
+
+class TestGenerateHookConfig:
+    """Test the generated curl commands."""
+
+    def test_braces_in_address_kept_literally(self) -> None:
+        """Braces in the address are not treated as format fields."""
+        config = install_hooks.generate_hook_config(23518, "host{0}")
+        for event, entries in config["hooks"].items():
+            command = entries[0]["hooks"][0]["command"]
+            assert "http://host{0}:23518/hook" in command
+            assert command.endswith(f"event={event}' || true")
+
+
+class TestMergeSettings:
+    """Test merging observatory hooks into existing settings."""
+
+    def test_merge_keeps_existing_hooks(self) -> None:
+        """Hooks for other events survive a merge."""
+        merged = install_hooks.merge_settings(existing_settings(), observatory_hooks())
+        assert merged["model"] == "opus"
+        assert "PreToolUse" in merged["hooks"]
+        assert merged["hooks"]["Stop"] == observatory_hooks()["hooks"]["Stop"]
+
+    def test_merge_does_not_modify_existing(self) -> None:
+        """The input settings are left as loaded, so they can still be diffed."""
+        existing = existing_settings()
+        install_hooks.merge_settings(existing, observatory_hooks())
+        assert existing == existing_settings()
+
+    def test_dry_run_shows_diff_for_existing_hooks(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture[str]
+    ) -> None:
+        """Installing over existing hooks previews a non-empty diff."""
+        path = tmp_path / "settings.json"
+        path.write_text(json.dumps(existing_settings(), indent=2) + "\n")
+        existing = install_hooks.load_settings(path)
+        merged = install_hooks.merge_settings(existing, observatory_hooks())
+        args = argparse.Namespace(dry_run=True, yes=True)
+        with pytest.raises(SystemExit):
+            install_hooks.apply_settings(path, existing, merged, args)
+        out = capsys.readouterr().out
+        assert "No changes." not in out
+        assert "+    \"PreToolUse\"" in out
+        assert json.loads(path.read_text()) == existing_settings()  # dry run wrote nothing
+
+
+class TestWriteSettings:
+    """Test the atomic settings write."""
+
+    def test_follows_symlink(self, tmp_path: Path) -> None:
+        """A symlinked settings.json stays a link; its target gets the content."""
+        real = tmp_path / "dotfiles-settings.json"
+        real.write_text("{}\n")
+        link = tmp_path / "settings.json"
+        link.symlink_to(real)
+        install_hooks.write_settings(link, '{"model": "opus"}\n')
+        assert link.is_symlink()
+        assert real.read_text() == '{"model": "opus"}\n'
+
+    def test_keeps_permissions(self, tmp_path: Path) -> None:
+        """A private (0600) settings file is still 0600 after the write."""
+        path = tmp_path / "settings.json"
+        path.write_text("{}\n")
+        path.chmod(0o600)
+        install_hooks.write_settings(path, '{"model": "opus"}\n')
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+        assert path.read_text() == '{"model": "opus"}\n'
+
+
+class TestCreateBackup:
+    """Test the timestamped backup copy."""
+
+    def test_keeps_permissions(self, tmp_path: Path) -> None:
+        """The backup of a 0600 settings file is 0600 too."""
+        path = tmp_path / "settings.json"
+        path.write_text('{"model": "opus"}\n')
+        path.chmod(0o600)
+        backup = install_hooks.create_backup(path)
+        assert stat.S_IMODE(backup.stat().st_mode) == 0o600
+        assert backup.read_text() == path.read_text()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
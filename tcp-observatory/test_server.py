@@ -1,7 +1,7 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.10"
-# dependencies = ["pytest", "pyyaml", "pygments"]
+# dependencies = ["pytest", "pyyaml", "pygments", "orjson"]
 # ///
 """
 Claude Code Hooks Observatory - Tests
@@ -19,12 +19,13 @@ Usage:
 
 from __future__ import annotations
 
+import http.client
 import io
 import json
 import os
 import sys
-from datetime import datetime
-from http.server import HTTPServer
+from datetime import datetime, timezone
+from http.server import HTTPServer, ThreadingHTTPServer
 from threading import Thread
 from typing import Any, Generator
 from unittest.mock import patch
@@ -39,6 +40,7 @@ from server import (
     get_port,
     get_timestamp,
     output_event,
+    parse_event,
     DEFAULT_PORT,
     ENV_PORT,
 )
@@ -78,33 +80,64 @@ class TestEnrichPayload:
         assert set(metadata_keys) == {"_ts", "_event", "_client"}
 
 
+def capture_stdout() -> Any:
+    """Patch sys.stdout with a text stream whose .buffer collects bytes.
+
+    output_event() writes encoded bytes to sys.stdout.buffer, which a plain
+    io.StringIO doesn't have.
+    """
+    return patch("sys.stdout", new=io.TextIOWrapper(io.BytesIO(), encoding="utf-8"))
+
+
+class TestParseEvent:
+    """Test extraction of ?event= from the request path."""
+
+    def test_simple(self) -> None:
+        """Plain hook URL yields the event name."""
+        assert parse_event("/hook?event=PreToolUse") == "PreToolUse"
+
+    def test_other_params(self) -> None:
+        """event= is found among other query parameters."""
+        assert parse_event("/hook?x=1&event=Stop&y=2") == "Stop"
+
+    def test_percent_decoded(self) -> None:
+        """Percent-encoded values are decoded like parse_qs would."""
+        assert parse_event("/hook?event=My%20Event") == "My Event"
+
+    def test_missing_is_unknown(self) -> None:
+        """Missing, empty, or look-alike parameters give 'Unknown'."""
+        assert parse_event("/hook") == "Unknown"
+        assert parse_event("/hook?event=") == "Unknown"
+        assert parse_event("/hook?myevent=Stop") == "Unknown"
+
+
 class TestOutputJSONL:
     """Test JSONL output format."""
 
     def test_output_is_single_line(self) -> None:
         """Payload is compacted to single line."""
         data = {"key": "value", "nested": {"a": 1, "b": 2}}
-        with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
+        with capture_stdout() as mock_stdout:
             output_event(data)
-            output = mock_stdout.getvalue()
+            output = mock_stdout.buffer.getvalue().decode()
         assert output.count("\n") == 1
         assert "\n" not in output.rstrip("\n")
 
     def test_output_is_valid_json(self) -> None:
         """Output can be parsed as JSON."""
         data = {"key": "value", "number": 42}
-        with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
+        with capture_stdout() as mock_stdout:
             output_event(data)
-            output = mock_stdout.getvalue().strip()
+            output = mock_stdout.buffer.getvalue().decode().strip()
         parsed = json.loads(output)
         assert parsed == data
 
     def test_output_is_compact(self) -> None:
         """No unnecessary whitespace in output."""
         data = {"a": 1, "b": 2}
-        with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
+        with capture_stdout() as mock_stdout:
             output_event(data)
-            output = mock_stdout.getvalue().strip()
+            output = mock_stdout.buffer.getvalue().decode().strip()
         # Compact format uses no spaces after separators
         assert " " not in output
 
@@ -152,28 +185,45 @@ class TestGetTimestamp:
         # UTC timestamps end with +00:00 or Z
         assert "+00:00" in ts or ts.endswith("Z")
 
+    def test_matches_datetime_isoformat(self) -> None:
+        """Cached timestamp has the same shape as datetime's isoformat()."""
+        before = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        ts = get_timestamp()
+        after = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        assert before <= ts <= after
+
+
+@pytest.fixture(scope="module")
+def server() -> Generator[HTTPServer, None, None]:
+    """Create one test server on a random port, shared by the endpoint tests.
+
+    HookHandler keeps no per-request state, so tests can share a server and
+    skip a bind + thread start + shutdown each.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), HookHandler)
+    thread = Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def conn(server: HTTPServer) -> Generator[http.client.HTTPConnection, None, None]:
+    """One HTTP/1.1 keep-alive connection to the test server, reused by every request."""
+    host, port = server.server_address
+    conn = http.client.HTTPConnection(host, port)
+    yield conn
+    conn.close()
+
 
 class TestHookEndpoint:
     """Test the /hook endpoint for each event type."""
 
-    @pytest.fixture
-    def server(self) -> Generator[HTTPServer, None, None]:
-        """Create a test server on a random port."""
-        server = HTTPServer(("127.0.0.1", 0), HookHandler)
-        thread = Thread(target=server.serve_forever)
-        thread.daemon = True
-        thread.start()
-        yield server
-        server.shutdown()
-
     def make_request(
-        self, server: HTTPServer, event: str, payload: dict[str, Any]
+        self, conn: http.client.HTTPConnection, event: str, payload: dict[str, Any]
     ) -> tuple[int, bytes]:
-        """Make a POST request to the hook endpoint."""
-        import http.client
-
-        host, port = server.server_address
-        conn = http.client.HTTPConnection(host, port)
+        """Make a POST request to the hook endpoint over the shared connection."""
         body = json.dumps(payload)
         conn.request(
             "POST",
@@ -184,59 +234,59 @@ class TestHookEndpoint:
         response = conn.getresponse()
         return response.status, response.read()
 
-    def test_pre_tool_use_returns_empty_200(self, server: HTTPServer) -> None:
+    def test_pre_tool_use_returns_empty_200(self, conn: http.client.HTTPConnection) -> None:
         """PreToolUse: returns 200 with empty body (no-op)."""
         payload = {"tool_name": "Bash", "tool_input": {"command": "ls"}}
-        status, body = self.make_request(server, "PreToolUse", payload)
+        status, body = self.make_request(conn, "PreToolUse", payload)
         assert status == 200
         assert body == b""
 
-    def test_post_tool_use_returns_empty_200(self, server: HTTPServer) -> None:
+    def test_post_tool_use_returns_empty_200(self, conn: http.client.HTTPConnection) -> None:
         """PostToolUse: returns 200 with empty body (no-op)."""
         payload = {"tool_name": "Read", "tool_response": {"content": "..."}}
-        status, body = self.make_request(server, "PostToolUse", payload)
+        status, body = self.make_request(conn, "PostToolUse", payload)
         assert status == 200
         assert body == b""
 
-    def test_session_start_returns_empty_200(self, server: HTTPServer) -> None:
+    def test_session_start_returns_empty_200(self, conn: http.client.HTTPConnection) -> None:
         """SessionStart: returns 200 with empty body (no-op)."""
         payload = {"source": "startup", "model": "claude-sonnet-4-5"}
-        status, body = self.make_request(server, "SessionStart", payload)
+        status, body = self.make_request(conn, "SessionStart", payload)
         assert status == 200
         assert body == b""
 
-    def test_session_end_returns_empty_200(self, server: HTTPServer) -> None:
+    def test_session_end_returns_empty_200(self, conn: http.client.HTTPConnection) -> None:
         """SessionEnd: returns 200 with empty body (no-op)."""
         payload = {"reason": "logout"}
-        status, body = self.make_request(server, "SessionEnd", payload)
+        status, body = self.make_request(conn, "SessionEnd", payload)
         assert status == 200
         assert body == b""
 
-    def test_user_prompt_submit_returns_empty_200(self, server: HTTPServer) -> None:
+    def test_user_prompt_submit_returns_empty_200(self, conn: http.client.HTTPConnection) -> None:
         """UserPromptSubmit: returns 200 with empty body (no-op)."""
         payload = {"prompt": "Hello, Claude!"}
-        status, body = self.make_request(server, "UserPromptSubmit", payload)
+        status, body = self.make_request(conn, "UserPromptSubmit", payload)
         assert status == 200
         assert body == b""
 
-    def test_stop_returns_empty_200(self, server: HTTPServer) -> None:
+    def test_stop_returns_empty_200(self, conn: http.client.HTTPConnection) -> None:
         """Stop: returns 200 with empty body (no-op)."""
         payload = {"stop_hook_active": True}
-        status, body = self.make_request(server, "Stop", payload)
+        status, body = self.make_request(conn, "Stop", payload)
         assert status == 200
         assert body == b""
 
-    def test_permission_request_returns_empty_200(self, server: HTTPServer) -> None:
+    def test_permission_request_returns_empty_200(self, conn: http.client.HTTPConnection) -> None:
         """PermissionRequest: returns 200 with empty body (no-op)."""
         payload = {"tool_name": "Bash", "tool_input": {"command": "rm -rf /"}}
-        status, body = self.make_request(server, "PermissionRequest", payload)
+        status, body = self.make_request(conn, "PermissionRequest", payload)
         assert status == 200
         assert body == b""
 
-    def test_notification_returns_empty_200(self, server: HTTPServer) -> None:
+    def test_notification_returns_empty_200(self, conn: http.client.HTTPConnection) -> None:
         """Notification: returns 200 with empty body (no-op)."""
         payload = {"message": "Permission needed", "notification_type": "permission_prompt"}
-        status, body = self.make_request(server, "Notification", payload)
+        status, body = self.make_request(conn, "Notification", payload)
         assert status == 200
         assert body == b""
 
@@ -244,22 +294,8 @@ class TestHookEndpoint:
 class TestHealthEndpoint:
     """Test the /health endpoint."""
 
-    @pytest.fixture
-    def server(self) -> Generator[HTTPServer, None, None]:
-        """Create a test server on a random port."""
-        server = HTTPServer(("127.0.0.1", 0), HookHandler)
-        thread = Thread(target=server.serve_forever)
-        thread.daemon = True
-        thread.start()
-        yield server
-        server.shutdown()
-
-    def test_health_returns_ok(self, server: HTTPServer) -> None:
+    def test_health_returns_ok(self, conn: http.client.HTTPConnection) -> None:
         """GET /health returns status ok."""
-        import http.client
-
-        host, port = server.server_address
-        conn = http.client.HTTPConnection(host, port)
         conn.request("GET", "/health")
         response = conn.getresponse()
         assert response.status == 200
@@ -28,6 +28,7 @@ import difflib
 import json
 import os
 import shutil
+import stat
 import sys
 from datetime import datetime
 from pathlib import Path
@@ -77,43 +78,45 @@ def get_project_settings_path() -> Path:
     return Path.cwd() / ".claude" / "settings.json"
 
 
-def generate_curl_command(socket_path: str, event: str) -> str:
-    """Generate curl command for a hook event using Unix socket.
+def curl_command_parts(socket_path: str) -> tuple[str, str]:
+    """Return the curl command as (prefix, suffix) around the event name.
 
     curl --unix-socket tells curl to connect via the Unix socket file
     instead of TCP. The http://localhost URL is required by curl but
     the hostname is ignored - only the socket path matters for routing.
 
     Appends '|| true' so hooks silently no-op when server is not running.
+    Plain concatenation (not str.format) so braces in a socket path are safe.
     """
-    return (
+    prefix = (
         f"curl -s --connect-timeout 0.5 --max-time 1 "
         f"--unix-socket {socket_path} "
         f"-X POST -H 'Content-Type: application/json' -d @- "
-        f"'http://localhost/hook?event={event}' || true"
+        f"'http://localhost/hook?event="
     )
+    return prefix, "' || true"
 
 
-def generate_hook_config(socket_path: str) -> dict[str, Any]:
-    """Generate complete hook configuration for all events."""
-    hooks: dict[str, list[dict[str, Any]]] = {}
-
-    for event in HOOK_EVENTS:
-        hook_entry: dict[str, Any] = {
-            "hooks": [
-                {
-                    "type": "command",
-                    "command": generate_curl_command(socket_path, event),
-                }
-            ]
-        }
+def generate_curl_command(socket_path: str, event: str) -> str:
+    """Generate curl command for a hook event using Unix socket."""
+    prefix, suffix = curl_command_parts(socket_path)
+    return prefix + event + suffix
 
-        # Add matcher for events that support it
-        if event in MATCHER_EVENTS:
-            hook_entry["matcher"] = MATCHER_EVENTS[event]
 
-        hooks[event] = [hook_entry]
+def generate_hook_config(socket_path: str) -> dict[str, Any]:
+    """Generate complete hook configuration for all events.
 
+    The command prefix/suffix are built once; each event only fills in its name.
+    Events listed in MATCHER_EVENTS also get a matcher.
+    """
+    prefix, suffix = curl_command_parts(socket_path)
+    hooks: dict[str, list[dict[str, Any]]] = {
+        event: [{
+            "hooks": [{"type": "command", "command": prefix + event + suffix}],
+            **({"matcher": MATCHER_EVENTS[event]} if event in MATCHER_EVENTS else {}),
+        }]
+        for event in HOOK_EVENTS
+    }
     return {"hooks": hooks}
 
 
@@ -137,55 +140,106 @@ def merge_settings(
     if replace or "hooks" not in result:
         result["hooks"] = new_hooks["hooks"]
     else:
-        # Merge hook events
-        for event, config in new_hooks["hooks"].items():
-            result["hooks"][event] = config
+        # Merge hook events into a new dict: result is a shallow copy, so
+        # writing into result["hooks"] would also change existing["hooks"]
+        result["hooks"] = {**result["hooks"], **new_hooks["hooks"]}
 
     return result
 
 
+def _without_marker(hooks_list: list[dict[str, Any]], marker: str) -> list[dict[str, Any]]:
+    """Drop hooks whose command contains marker, in a single pass.
+
+    Returns hooks_list itself when nothing matched, so untouched configs
+    cost no allocation.
+    """
+    kept: list[dict[str, Any]] | None = None
+    for i, hook in enumerate(hooks_list):
+        if marker in hook.get("command", ""):
+            if kept is None:
+                kept = hooks_list[:i]
+        elif kept is not None:
+            kept.append(hook)
+    return hooks_list if kept is None else kept
+
+
 def remove_observatory_hooks(settings: dict[str, Any], socket_path: str) -> dict[str, Any]:
     """Remove observatory hooks from settings."""
     if "hooks" not in settings:
         return settings
 
-    result = settings.copy()
-    result["hooks"] = {}
     # Match on --unix-socket marker to identify our hooks
     observatory_marker = "--unix-socket"
 
+    # Copy-on-write: a config is copied only when its hook list changed;
+    # untouched configs are shared with (and never mutated in) the input.
+    new_hooks: dict[str, list[dict[str, Any]]] = {}
     for event, configs in settings["hooks"].items():
-        filtered = []
+        kept = []
         for config in configs:
             hooks_list = config.get("hooks", [])
-            filtered_hooks = [
-                h for h in hooks_list
-                if observatory_marker not in h.get("command", "")
-            ]
-            if filtered_hooks:
-                new_config = config.copy()
-                new_config["hooks"] = filtered_hooks
-                filtered.append(new_config)
-        if filtered:
-            result["hooks"][event] = filtered
+            filtered = _without_marker(hooks_list, observatory_marker)
+            if filtered:
+                kept.append(config if filtered is hooks_list else {**config, "hooks": filtered})
+        if kept:
+            new_hooks[event] = kept
+
+    result = {**settings, "hooks": new_hooks}
 
     # Remove empty hooks dict
-    if not result["hooks"]:
+    if not new_hooks:
         del result["hooks"]
 
     return result
 
 
 def create_backup(path: Path) -> Path:
-    """Create timestamped backup of settings file."""
+    """Create timestamped backup of settings file.
+
+    copyfile skips copy2's timestamp and xattr syscalls; the chmod then
+    gives the backup the original's permission bits, so a backup of a
+    private 0600 settings file stays private.
+    """
     timestamp = datetime.now().strftime("%y%m%d-%H%M")
     backup_path = path.with_suffix(f".json.bak-{timestamp}")
-    shutil.copy2(path, backup_path)
+    shutil.copyfile(path, backup_path)
+    os.chmod(backup_path, stat.S_IMODE(os.stat(path).st_mode))
     return backup_path
 
 
+def write_settings(path: Path, content: str) -> None:
+    """Write settings atomically: temp file in the same directory, then rename.
+
+    os.replace() is a single atomic rename, and the data is fsynced before
+    it, so a crash mid-write can never leave a truncated settings.json
+    behind. A symlinked settings.json (as dotfile managers create) is
+    resolved first, so the link survives and its target is what's replaced.
+    The temp file is created with the target's permission bits, so a 0600
+    file stays 0600 and is never readable by others in between.
+    """
+    target = path.resolve()
+    try:
+        mode = stat.S_IMODE(target.stat().st_mode)
+    except FileNotFoundError:
+        mode = None
+    tmp_path = target.with_name(target.name + ".tmp")
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    fd = os.open(tmp_path, flags, 0o666 if mode is None else mode)  # new: umask decides
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    if mode is not None:
+        os.chmod(tmp_path, mode)  # os.open's mode is filtered by the umask
+    os.replace(tmp_path, target)
+
+
 def show_diff(old_content: str, new_content: str, path: Path) -> None:
     """Display unified diff between old and new content."""
+    if old_content == new_content:
+        print("No changes.")
+        return
+
     old_lines = old_content.splitlines(keepends=True)
     new_lines = new_content.splitlines(keepends=True)
 
@@ -300,9 +354,75 @@ def get_socket_path(cli_path: str | None) -> str:
     return DEFAULT_SOCKET
 
 
+def scope_settings_path(scope: str) -> Path:
+    """Return the settings file for a scope ("global" or "project")."""
+    if scope == "global":
+        return get_global_settings_path()
+    return get_project_settings_path()
+
+
+def apply_settings(
+    target_path: Path,
+    existing: dict[str, Any],
+    new_settings: dict[str, Any],
+    args: argparse.Namespace,
+) -> None:
+    """Show the diff, confirm unless --yes, then back up and write.
+
+    Exits without writing on --dry-run or when the user declines.
+    """
+    # Serialized once, trailing newline included: the diff shows exactly the
+    # text that write_settings() puts on disk.
+    new_content = json.dumps(new_settings, indent=2) + "\n"
+
+    # Show diff (skipped for unattended --yes runs where nobody reads it)
+    if args.dry_run or not args.yes or sys.stdout.isatty():
+        print("\n--- Changes ---")
+        if new_settings == existing:
+            # Nothing to diff: skip re-serializing the old settings at all
+            print("No changes.")
+        else:
+            old_content = json.dumps(existing, indent=2) if existing else "{}"
+            show_diff(old_content + "\n", new_content, target_path)
+    else:
+        print("\n(Diff not shown for non-interactive --yes; use --dry-run to preview)")
+
+    if args.dry_run:
+        print("\n[Dry run - no changes made]")
+        sys.exit(0)
+
+    # Confirm
+    if not args.yes:
+        if not prompt_confirm(f"\nApply these changes?", default=True):
+            print("Aborted.")
+            sys.exit(0)
+
+    # Create parent directory if needed
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Create backup if file exists
+    if target_path.exists():
+        backup_path = create_backup(target_path)
+        print(f"Backup created: {backup_path}")
+
+    # Write new settings
+    write_settings(target_path, new_content)
+    print(f"\nSettings written to {target_path}")
+
+
+def print_next_steps(uninstalled: bool, socket_path: str) -> None:
+    """Tell the user what to do after a successful write."""
+    if uninstalled:
+        print("\nObservatory hooks removed.")
+    else:
+        print(f"\nTo start the observatory:")
+        print(f"  ./server.py --socket {socket_path}")
+
+
 def main() -> None:
     """Main entry point."""
     args = parse_args()
+
     socket_path = get_socket_path(args.socket)
 
     # Determine target scope
@@ -316,22 +436,17 @@ def main() -> None:
         scope = "global" if "global" in scope else "project"
 
     # Get target path
-    if scope == "global":
-        target_path = get_global_settings_path()
-    else:
-        target_path = get_project_settings_path()
+    target_path = scope_settings_path(scope)
 
     print(f"\nTarget: {target_path}")
     print(f"Socket: {socket_path}")
 
     # Load existing settings
     existing = load_settings(target_path)
-    old_content = json.dumps(existing, indent=2) if existing else "{}"
 
     if args.uninstall:
         # Remove observatory hooks
         new_settings = remove_observatory_hooks(existing, socket_path)
-        action = "uninstall"
     else:
         # Generate and merge new hooks
         new_hooks = generate_hook_config(socket_path)
@@ -353,41 +468,9 @@ def main() -> None:
             replace = False
 
         new_settings = merge_settings(existing, new_hooks, replace)
-        action = "install"
-
-    new_content = json.dumps(new_settings, indent=2)
-
-    # Show diff
-    print("\n--- Changes ---")
-    show_diff(old_content + "\n", new_content + "\n", target_path)
-
-    if args.dry_run:
-        print("\n[Dry run - no changes made]")
-        sys.exit(0)
 
-    # Confirm
-    if not args.yes:
-        if not prompt_confirm(f"\nApply these changes?", default=True):
-            print("Aborted.")
-            sys.exit(0)
-
-    # Create parent directory if needed
-    target_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Create backup if file exists
-    if target_path.exists():
-        backup_path = create_backup(target_path)
-        print(f"Backup created: {backup_path}")
-
-    # Write new settings
-    target_path.write_text(new_content + "\n")
-    print(f"\nSettings written to {target_path}")
-
-    if action == "install":
-        print(f"\nTo start the observatory:")
-        print(f"  ./server.py --socket {socket_path}")
-    else:
-        print("\nObservatory hooks removed.")
+    apply_settings(target_path, existing, new_settings, args)
+    print_next_steps(args.uninstall, socket_path)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.10"
-# dependencies = ["pyyaml", "pygments"]
+# dependencies = ["pyyaml", "pygments", "orjson"]
 # ///
 """
 Claude Code Hooks Observatory - Unix Socket Server (HTTPServer-based)
@@ -25,35 +25,60 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 import os
+import selectors
 import socket
 import struct
 import sys
-from datetime import datetime, timezone
+import threading
+import time
+from collections import deque
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Any
-from urllib.parse import parse_qs, urlparse
+from typing import Any, Callable
+from urllib.parse import unquote_plus
 
 import yaml
 from pygments import highlight
 from pygments.lexers import YamlLexer
 from pygments.formatters import Terminal256Formatter
 
+try:
+    import orjson
+except ImportError:  # plain `python server.py` without uv: stdlib json works too
+    orjson = None
+
 DEFAULT_SOCKET = "/tmp/claude-observatory.sock"
 ENV_SOCKET = "CLAUDE_UNIX_HOOK_WATCHER"
-
-# Module-level output mode (set from CLI args in main)
-# Values: "jsonl" (default), "pretty-json", "pretty-yaml"
-_output_mode = "jsonl"
-
-
-class _MultilineYamlDumper(yaml.SafeDumper):
+ENV_HTTP_LOG = "CLAUDE_HTTP_LOG"
+# Listen backlog for both sockets. The kernel silently caps it at
+# net.core.somaxconn (Linux) / kern.ipc.somaxconn (macOS).
+LISTEN_BACKLOG = 4096
+# Reusable per-server buffer for POST bodies; larger bodies are read normally.
+BODY_BUFFER_SIZE = 64 * 1024
+# Kernel send buffer per output reader: slack for a reader that falls
+# behind during a burst before it's dropped. Capped by net.core.wmem_max.
+READER_SNDBUF = 1 << 20
+# Lines queued for a reader whose kernel buffer is full; past this the
+# reader is considered stalled and dropped.
+READER_QUEUE_MAX = 10_000
+
+
+# libyaml's C emitter is far faster than the pure-Python one; PyYAML builds
+# without libyaml only have SafeDumper. Representers work the same on both.
+try:
+    from yaml import CSafeDumper as _BaseDumper
+except ImportError:
+    from yaml import SafeDumper as _BaseDumper
+
+
+class _MultilineYamlDumper(_BaseDumper):
     """YAML dumper that renders strings containing newlines as block scalars (|)."""
     pass
 
 
-def _str_representer(dumper: yaml.SafeDumper, data: str) -> yaml.Node:
+def _str_representer(dumper: _BaseDumper, data: str) -> yaml.Node:
     if "\n" in data:
         return dumper.represent_scalar("tag:yaml.org,2002:str", data, style="|")
     return dumper.represent_scalar("tag:yaml.org,2002:str", data)
@@ -61,93 +86,223 @@ def _str_representer(dumper: yaml.SafeDumper, data: str) -> yaml.Node:
 
 _MultilineYamlDumper.add_representer(str, _str_representer)
 
+# Built once: constructing a pygments lexer/formatter per event is expensive.
+_YAML_LEXER = YamlLexer()
+_YAML_FORMATTER = Terminal256Formatter()
+
+# Whether stdout is a terminal; checked once in main() (stdout doesn't change
+# mid-run). Decides YAML highlighting.
+_IS_TTY = False
+
+
+def json_loads(body: bytes | memoryview) -> Any:
+    """Parse JSON bytes (orjson when available; both raise json.JSONDecodeError)."""
+    if orjson is not None:
+        return orjson.loads(body)  # reads a memoryview in place
+    return json.loads(bytes(body) if isinstance(body, memoryview) else body)
+
+
+# Compact separators bound once instead of re-parsing json.dumps kwargs per event.
+_COMPACT = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def json_bytes(data: Any, indent: bool = False, newline: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes: compact, or 2-space indented.
+
+    newline=True appends the line terminator during serialization (orjson's
+    OPT_APPEND_NEWLINE), saving a copy of every output line.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(data, option=option)
+    text = json.dumps(data, indent=2) if indent else _COMPACT(data)
+    return (text + "\n" if newline else text).encode()
+
+
+# (epoch second, formatted) for the last timestamp handed out.
+_ts_cache: tuple[int, str] = (-1, "")
+
 
 def get_timestamp() -> str:
-    """Return current UTC timestamp in ISO format."""
-    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+    """Return current UTC timestamp in ISO format (second resolution).
 
+    Events in a burst share a wall-clock second, so the string is built
+    once per second rather than via datetime on every call.
+    """
+    global _ts_cache
+    sec = int(time.time())
+    cached_sec, text = _ts_cache
+    if sec != cached_sec:
+        t = time.gmtime(sec)
+        text = "%04d-%02d-%02dT%02d:%02d:%02d+00:00" % t[:6]
+        _ts_cache = (sec, text)
+    return text
+
+
+# Precompiled credential struct layouts (see get_peer_creds).
+_UCRED = struct.Struct("3i")  # Linux struct ucred: pid, uid, gid
+_XUCRED = struct.Struct("IIh16I")  # macOS struct xucred
+_PEERPID = struct.Struct("I")  # macOS LOCAL_PEERPID: pid_t
 
-def get_peer_creds(sock: socket.socket) -> tuple[int, int, int] | None:
-    """Get peer credentials (pid, uid, gid) from a Unix socket connection.
 
-    Uses SO_PEERCRED on Linux, LOCAL_PEERCRED on macOS. These are
-    kernel-verified - the connecting process cannot forge them.
+def _get_peer_creds_linux(sock: socket.socket) -> tuple[int, int, int] | None:
+    """SO_PEERCRED: the kernel fills a struct ucred {pid_t pid; uid_t uid; gid_t gid;}.
 
-    Returns None on unsupported platforms or errors.
+    This tells us exactly which process is on the other end of this socket.
     """
-    # === SO_PEERCRED (Linux) ===
-    # The kernel fills a struct ucred {pid_t pid; uid_t uid; gid_t gid;}
-    # when we call getsockopt with SO_PEERCRED. This tells us exactly
-    # which process is on the other end of this socket.
     try:
         SO_PEERCRED = 17  # Linux constant
-        cred = sock.getsockopt(socket.SOL_SOCKET, SO_PEERCRED, struct.calcsize("3i"))
-        pid, uid, gid = struct.unpack("3i", cred)
+        cred = sock.getsockopt(socket.SOL_SOCKET, SO_PEERCRED, _UCRED.size)
+        pid, uid, gid = _UCRED.unpack(cred)
         # pid=0 means the socket isn't connected or isn't AF_UNIX
         if pid > 0:
             return (pid, uid, gid)
     except (OSError, struct.error):
         pass
+    return None
+
 
-    # === LOCAL_PEERCRED (macOS) ===
-    # macOS uses a different socket option and struct layout.
+def _get_peer_creds_darwin(sock: socket.socket) -> tuple[int, int, int] | None:
+    """LOCAL_PEERCRED: macOS uses a different socket option and struct layout."""
     try:
         LOCAL_PEERCRED = 0x001  # macOS constant
         # struct xucred on macOS: uint version, uid_t uid, short ngroups, gid_t groups[16]
-        buf = sock.getsockopt(socket.SOL_LOCAL, LOCAL_PEERCRED, struct.calcsize("IIh16I"))
-        _, uid, ngroups, *groups = struct.unpack("IIh16I", buf)
+        buf = sock.getsockopt(socket.SOL_LOCAL, LOCAL_PEERCRED, _XUCRED.size)
+        _, uid, ngroups, *groups = _XUCRED.unpack(buf)
         gid = groups[0] if ngroups > 0 else -1
         # macOS LOCAL_PEERCRED doesn't provide PID directly
         # LOCAL_PEERPID (0x002) is a separate option
         try:
             LOCAL_PEERPID = 0x002
-            pid_buf = sock.getsockopt(socket.SOL_LOCAL, LOCAL_PEERPID, struct.calcsize("I"))
-            pid = struct.unpack("I", pid_buf)[0]
+            pid_buf = sock.getsockopt(socket.SOL_LOCAL, LOCAL_PEERPID, _PEERPID.size)
+            pid = _PEERPID.unpack(pid_buf)[0]
         except (OSError, AttributeError):
             pid = -1
         return (pid, uid, gid)
     except (OSError, struct.error, AttributeError):
-        pass
+        return None
+
 
+def _get_peer_creds_unsupported(sock: socket.socket) -> None:
+    """No peer-credential API we know how to read on this platform."""
     return None
 
 
+# get_peer_creds(sock) -> (pid, uid, gid) | None
+#
+# Peer credentials of a Unix socket connection: SO_PEERCRED on Linux,
+# LOCAL_PEERCRED on macOS. These are kernel-verified - the connecting
+# process cannot forge them. Returns None on unsupported platforms or errors.
+#
+# The platform is picked once here, so each hook only pays for the one
+# getsockopt() that can succeed instead of probing Linux first everywhere.
+if sys.platform.startswith("linux"):
+    get_peer_creds = _get_peer_creds_linux
+elif sys.platform == "darwin":
+    get_peer_creds = _get_peer_creds_darwin
+else:
+    get_peer_creds = _get_peer_creds_unsupported
+
+
+def parse_event(path: str) -> str:
+    """Extract the `event` query parameter from a request path.
+
+    Hook URLs always look like /hook?event=PreToolUse, so this slices the
+    value out directly instead of building urlparse/parse_qs structures.
+    Returns "Unknown" when the parameter is missing or empty.
+    """
+    i = path.find("?event=")
+    if i < 0:
+        i = path.find("&event=")
+        if i < 0:
+            return "Unknown"
+    event = path[i + 7:].partition("&")[0]
+    if "%" in event or "+" in event:
+        event = unquote_plus(event)
+    return event or "Unknown"
+
+
+# First bytes a JSON object body can start with: "{" or leading whitespace.
+_OBJECT_START = frozenset(b"{ \t\r\n")
+
+
+def parse_body(body: bytes | memoryview) -> dict[str, Any]:
+    """Decode a hook body as a JSON object, keeping anything else under _raw.
+
+    Hook payloads are always objects, so a body that can't start one skips
+    the parser (and its exception) entirely. Valid JSON that isn't an
+    object (e.g. a list) also lands in _raw instead of breaking enrichment.
+    """
+    if not body:
+        return {}
+    if body[0] in _OBJECT_START:
+        try:
+            payload = json_loads(body)
+        except ValueError:  # JSONDecodeError, or invalid UTF-8 under stdlib json
+            pass
+        else:
+            if isinstance(payload, dict):
+                return payload
+    return {"_raw": bytes(body).decode("utf-8", errors="replace")}
+
+
 def enrich_payload(
     payload: dict[str, Any], event: str, peer_creds: tuple[int, int, int] | None
 ) -> dict[str, Any]:
-    """Add metadata fields (prefixed with _) to the payload."""
-    result: dict[str, Any] = {
+    """Add metadata fields (prefixed with _) to the payload.
+
+    Returns a new dict so the metadata comes first; in-place updates could
+    only append it. A single dict display builds it in one pass.
+    """
+    if peer_creds is None:
+        return {"_ts": get_timestamp(), "_event": event, **payload}
+    pid, uid, gid = peer_creds
+    return {
         "_ts": get_timestamp(),
         "_event": event,
+        "_peer_pid": pid,
+        "_peer_uid": uid,
+        "_peer_gid": gid,
+        **payload,
     }
-    if peer_creds is not None:
-        pid, uid, gid = peer_creds
-        result["_peer_pid"] = pid
-        result["_peer_uid"] = uid
-        result["_peer_gid"] = gid
-    result.update(payload)
-    return result
-
-
-def format_event(data: dict[str, Any]) -> str:
-    """Format a single event in the configured output format. Returns string."""
-    match _output_mode:
-        case "pretty-yaml":
-            yaml_text = yaml.dump(
-                data, Dumper=_MultilineYamlDumper,
-                default_flow_style=False, sort_keys=False,
-            )
-            if sys.stdout.isatty():
-                return (
-                    "\033[90m---\033[0m\n"
-                    + highlight(yaml_text, YamlLexer(), Terminal256Formatter())
-                )
-            else:
-                return "---\n" + yaml_text
-        case "pretty-json":
-            return json.dumps(data, indent=2) + "\n"
-        case _:
-            return json.dumps(data, separators=(",", ":")) + "\n"
+
+
+def _encode_jsonl(data: dict[str, Any]) -> bytes:
+    """Compact single-line JSON (the default)."""
+    return json_bytes(data, newline=True)
+
+
+def _encode_pretty_json(data: dict[str, Any]) -> bytes:
+    """Indented multiline JSON."""
+    return json_bytes(data, indent=True, newline=True)
+
+
+def _encode_pretty_yaml(data: dict[str, Any]) -> bytes:
+    """YAML document with block scalars, highlighted on a terminal."""
+    yaml_text = yaml.dump(
+        data, Dumper=_MultilineYamlDumper,
+        default_flow_style=False, sort_keys=False,
+    )
+    if _IS_TTY:
+        return (
+            "\033[90m---\033[0m\n"
+            + highlight(yaml_text, _YAML_LEXER, _YAML_FORMATTER)
+        ).encode()
+    return ("---\n" + yaml_text).encode()
+
+
+_ENCODERS = {
+    "jsonl": _encode_jsonl,
+    "pretty-json": _encode_pretty_json,
+    "pretty-yaml": _encode_pretty_yaml,
+}
+
+# Format a single event in the configured output format, as UTF-8 bytes ready
+# for stdout and output sockets. Rebound once in main() from the CLI flags, so
+# there's no per-event mode dispatch.
+format_event = _encode_jsonl
 
 
 class OutputManager:
@@ -161,7 +316,9 @@ class OutputManager:
         self._tee = tee
         self._output_socket_path = output_socket_path
         self._listener: socket.socket | None = None
-        self._clients: list[socket.socket] = []
+        # Reader socket -> bytes not yet accepted by its kernel buffer.
+        self._clients: dict[socket.socket, deque[bytes]] = {}
+        self._selector: selectors.BaseSelector | None = None
 
         if output_socket_path:
             # Clean up stale socket file from a previous crash
@@ -170,48 +327,119 @@ class OutputManager:
             self._listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
             self._listener.setblocking(False)
             self._listener.bind(output_socket_path)
-            self._listener.listen(128)
+            self._listener.listen(LISTEN_BACKLOG)
             sys.stderr.write(f"Output socket: {output_socket_path}\n")
 
+    def attach(self, selector: selectors.BaseSelector | None) -> None:
+        """Join the server's event loop (None to leave it).
+
+        The listener is watched for new readers; a reader is watched for
+        writability only while it has queued data.
+        """
+        self._selector = selector
+        if selector is None:
+            return
+        if self._listener is not None:
+            selector.register(self._listener, selectors.EVENT_READ, self.accept_pending)
+        for client, queue in self._clients.items():
+            if queue:
+                self._watch(client)
+
     def accept_pending(self) -> None:
-        """Accept any pending output socket connections (non-blocking)."""
+        """Accept all pending output socket connections (non-blocking)."""
         if self._listener is None:
             return
-        try:
-            client, _ = self._listener.accept()
+        while True:
+            try:
+                client, _ = self._listener.accept()
+            except BlockingIOError:
+                return  # No more pending connections
             client.setblocking(False)
-            self._clients.append(client)
+            client.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, READER_SNDBUF)
+            self._clients[client] = deque()
             sys.stderr.write(f"Output reader connected ({len(self._clients)} total)\n")
-        except BlockingIOError:
-            pass  # No pending connections
 
-    def write(self, line: str) -> None:
-        """Write a line to the configured outputs."""
+    def write(self, line: bytes) -> None:
+        """Write an encoded line to the configured outputs."""
         if self._output_socket_path and not self._tee:
             # Output socket only - don't write to stdout
             self._write_to_clients(line)
         elif self._output_socket_path and self._tee:
             # Both stdout and output socket
-            sys.stdout.write(line)
-            sys.stdout.flush()
+            self._write_to_stdout(line)
             self._write_to_clients(line)
         else:
             # Default: stdout only
-            sys.stdout.write(line)
-            sys.stdout.flush()
+            self._write_to_stdout(line)
+
+    @staticmethod
+    def _write_to_stdout(data: bytes) -> None:
+        """Write bytes straight to stdout's binary buffer (no text-layer encode)."""
+        sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+
+    def _write_to_clients(self, data: bytes) -> None:
+        """Send data to all connected output socket clients.
 
-    def _write_to_clients(self, line: str) -> None:
-        """Send data to all connected output socket clients."""
+        Never blocks: whatever a reader's kernel buffer can't take right
+        now is queued for that reader alone and drained by _flush_client()
+        when the selector reports it writable, so one slow reader doesn't
+        hold up the others.
+        """
         dead: list[socket.socket] = []
-        data = line.encode()
-        for client in self._clients:
+        for client, queue in self._clients.items():
+            if queue:
+                # Already backed up: keep line order, send later
+                if len(queue) >= READER_QUEUE_MAX:
+                    dead.append(client)
+                else:
+                    queue.append(data)
+                continue
             try:
-                client.sendall(data)
-            except (BrokenPipeError, OSError):
+                sent = client.sendmsg((data,))
+            except BlockingIOError:
+                sent = 0
+            except OSError:
                 dead.append(client)
+                continue
+            if sent < len(data):
+                queue.append(data[sent:])
+                self._watch(client)
         for client in dead:
-            self._clients.remove(client)
-            client.close()
+            self._drop(client)
+
+    def _watch(self, client: socket.socket) -> None:
+        """Ask the event loop to call _flush_client() once client is writable."""
+        if self._selector is not None:
+            self._selector.register(
+                client, selectors.EVENT_WRITE, functools.partial(self._flush_client, client)
+            )
+
+    def _flush_client(self, client: socket.socket) -> None:
+        """Send as much of client's queue as its kernel buffer accepts."""
+        queue = self._clients[client]
+        try:
+            while queue:
+                sent = client.send(queue[0])
+                if sent < len(queue[0]):
+                    queue[0] = queue[0][sent:]
+                    return  # Buffer full again; wait for the next EVENT_WRITE
+                queue.popleft()
+        except BlockingIOError:
+            return
+        except OSError:
+            self._drop(client)
+            return
+        if self._selector is not None:
+            self._selector.unregister(client)
+
+    def _drop(self, client: socket.socket) -> None:
+        """Forget a closed or stalled reader."""
+        queue = self._clients.pop(client)
+        if queue and self._selector is not None:
+            self._selector.unregister(client)
+        client.close()
+        sys.stderr.write(f"Output reader disconnected ({len(self._clients)} total)\n")
 
     def cleanup(self) -> None:
         """Close all connections and unlink output socket."""
@@ -232,12 +460,12 @@ class UnixHTTPServer(HTTPServer):
     We override three things:
     1. address_family → AF_UNIX (use filesystem path, not IP:port)
     2. server_bind() → bind to path + set permissions
-    3. service_actions() → poll for output socket connections
+    3. serve_forever() → one selector for the hook and output-socket listeners
     """
 
     address_family = socket.AF_UNIX
     # Increase from default 5 so parallel hooks queue instead of being refused
-    request_queue_size = 128
+    request_queue_size = LISTEN_BACKLOG
 
     def __init__(
         self, socket_path: str, handler: type, mode: int, output_manager: OutputManager
@@ -245,9 +473,25 @@ class UnixHTTPServer(HTTPServer):
         self.socket_path = socket_path
         self._socket_mode = mode
         self.output_manager = output_manager
+        self._shutdown_requested = False
+        self._stopped = threading.Event()
+        self._stopped.set()
+        # shutdown() writes a byte here to wake a select() that has no timeout
+        self._wakeup_recv, self._wakeup_send = socket.socketpair()
+        self._wakeup_recv.setblocking(False)
+        self._wakeup_send.setblocking(False)
         # Clean up stale socket from a previous crash
         if os.path.exists(socket_path):
             os.unlink(socket_path)
+        # Each server gets its own handler subclass with this server's
+        # output_manager.write bound as _emit, so do_POST doesn't walk
+        # self.server.output_manager.write per event, and its own body
+        # buffer. A subclass (rather than patching the handler class) keeps
+        # two servers independent.
+        handler = type(handler.__name__, (handler,), {
+            "_emit": staticmethod(output_manager.write),
+            "_body_buf": memoryview(bytearray(BODY_BUFFER_SIZE)),
+        })
         # HTTPServer.__init__ calls server_bind() and server_activate()
         super().__init__(socket_path, handler)
 
@@ -259,68 +503,144 @@ class UnixHTTPServer(HTTPServer):
     def server_close(self) -> None:
         """Clean up: close socket and remove socket file."""
         super().server_close()
+        self._wakeup_recv.close()
+        self._wakeup_send.close()
         if os.path.exists(self.socket_path):
             os.unlink(self.socket_path)
         self.output_manager.cleanup()
 
-    def service_actions(self) -> None:
-        """Called by serve_forever() between handling requests.
+    def serve_forever(self, poll_interval: float | None = None) -> None:
+        """Handle requests until shutdown(), waiting on both listeners at once.
+
+        The stdlib loop only watches the hook socket, so output readers
+        could only be accepted between requests or on a poll timeout. Here
+        the output-socket listener sits in the same selector, so a reader
+        is accepted the moment it connects. Still single-threaded: one
+        hook request is handled at a time.
 
-        We use this to poll for new output socket connections without
-        needing a separate thread.
+        select() blocks with no timeout, so an idle server never wakes up;
+        shutdown() interrupts it through a socketpair. poll_interval is
+        accepted for compatibility with BaseServer and ignored.
         """
-        self.output_manager.accept_pending()
+        self._stopped.clear()
+        try:
+            with selectors.DefaultSelector() as selector:
+                # Each registration's data is the callback for that fd
+                selector.register(self, selectors.EVENT_READ, self._handle_request_noblock)
+                selector.register(self._wakeup_recv, selectors.EVENT_READ, self._drain_wakeup)
+                self.output_manager.attach(selector)
+                try:
+                    while not self._shutdown_requested:
+                        for key, _ in selector.select():
+                            key.data()
+                        self.service_actions()
+                finally:
+                    self.output_manager.attach(None)
+        finally:
+            self._shutdown_requested = False
+            self._stopped.set()
+
+    def _drain_wakeup(self) -> None:
+        """Discard shutdown() wakeup bytes; the loop then checks the flag."""
+        try:
+            while self._wakeup_recv.recv(64):
+                pass
+        except BlockingIOError:
+            pass
+
+    def shutdown(self) -> None:
+        """Stop serve_forever() and wait for it to exit (call from another thread)."""
+        self._shutdown_requested = True
+        try:
+            self._wakeup_send.send(b"\0")
+        except BlockingIOError:
+            pass  # Buffer already holds a wakeup byte
+        self._stopped.wait()
 
 
 class HookHandler(BaseHTTPRequestHandler):
     """HTTP request handler for hook events over Unix socket."""
 
     server: UnixHTTPServer  # type narrowing
+    # Set per server by UnixHTTPServer: its output_manager.write, and a
+    # body buffer that is safe to reuse because the server handles one
+    # request at a time
+    _emit: Callable[[bytes], None]
+    _body_buf: memoryview
+
+    # Canned responses: one wfile.write() instead of send_response/send_header
+    # formatting (status line, Server and Date headers) on every request.
+    # HTTP/1.0 matches the handler's protocol_version: one request per
+    # connection, closed after the response.
+    _OK_EMPTY = (
+        b"HTTP/1.0 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: 0\r\n\r\n"
+    )
+    _NOT_FOUND = b"HTTP/1.0 404 Not Found\r\nContent-Length: 0\r\n\r\n"
+    _HEALTH_RESPONSE = (
+        b"HTTP/1.0 200 OK\r\n"
+        b"Content-Type: application/json\r\n"
+        b"Content-Length: 15\r\n\r\n"
+        b'{"status":"ok"}'
+    )
+
+    # Per-request access logging costs a format + stderr write per hook, so
+    # it's opt-in. Errors (log_error) are always printed.
+    _log_requests = bool(os.environ.get(ENV_HTTP_LOG))
 
     def log_message(self, format: str, *args: Any) -> None:
         """Redirect HTTP logs to stderr to keep output clean."""
-        sys.stderr.write(f"[HTTP] {args[0]} {args[1]} {args[2]}\n")
+        sys.stderr.write(f"[HTTP] {' '.join(map(str, args))}\n")
+
+    def log_request(self, code: int | str = "-", size: int | str = "-") -> None:
+        """Log the request line only when CLAUDE_HTTP_LOG is set."""
+        if self._log_requests:
+            super().log_request(code, size)
 
     def do_POST(self) -> None:
         """Handle POST /hook?event=<EventType> requests."""
-        parsed = urlparse(self.path)
-        query = parse_qs(parsed.query)
-        event = query.get("event", ["Unknown"])[0]
+        event = parse_event(self.path)
 
         content_length = int(self.headers.get("Content-Length", 0))
-        body = self.rfile.read(content_length)
-
-        try:
-            payload = json.loads(body) if body else {}
-        except json.JSONDecodeError:
-            payload = {"_raw": body.decode("utf-8", errors="replace")}
+        payload = parse_body(self.read_body(content_length))
 
         # Get peer credentials from the Unix socket connection
         peer_creds = get_peer_creds(self.request)
 
         enriched = enrich_payload(payload, event, peer_creds)
-        formatted = format_event(enriched)
-        self.server.output_manager.write(formatted)
+        self._emit(format_event(enriched))
 
         # Return empty 200 (no-op response)
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", "0")
-        self.end_headers()
+        self.wfile.write(self._OK_EMPTY)
+        self.log_request(200)
+
+    def read_body(self, length: int) -> bytes | memoryview:
+        """Read the request body into the reusable buffer when it fits.
+
+        Returns a view of the buffer, valid until the next request. rfile
+        (not the raw socket) is read because it may already hold the start
+        of the body, buffered while the headers were parsed.
+        """
+        if length > len(self._body_buf):
+            return self.rfile.read(length)
+        view = self._body_buf[:length]
+        got = 0
+        while got < length:
+            n = self.rfile.readinto(view[got:])
+            if not n:
+                break  # Client closed early: parse what arrived
+            got += n
+        return view[:got]
 
     def do_GET(self) -> None:
         """Handle GET requests (health check)."""
         if self.path == "/health":
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            response = json.dumps({"status": "ok"})
-            self.send_header("Content-Length", str(len(response)))
-            self.end_headers()
-            self.wfile.write(response.encode())
+            self.wfile.write(self._HEALTH_RESPONSE)
+            self.log_request(200)
         else:
-            self.send_response(404)
-            self.send_header("Content-Length", "0")
-            self.end_headers()
+            self.wfile.write(self._NOT_FOUND)
+            self.log_request(404)
 
 
 def parse_args() -> argparse.Namespace:
@@ -392,14 +712,15 @@ def get_socket_path(cli_path: str | None) -> str:
 
 def main() -> None:
     """Start the observatory server."""
-    global _output_mode
+    global format_event, _IS_TTY
     args = parse_args()
     socket_path = get_socket_path(args.socket)
 
     if args.pretty_yaml:
-        _output_mode = "pretty-yaml"
+        format_event = _ENCODERS["pretty-yaml"]
     elif args.pretty_json:
-        _output_mode = "pretty-json"
+        format_event = _ENCODERS["pretty-json"]
+    _IS_TTY = sys.stdout.isatty()
 
     if args.tee and not args.output_socket:
         sys.stderr.write("Error: --tee requires --output-socket\n")
@@ -419,7 +740,7 @@ def main() -> None:
     sys.stderr.write("Press Ctrl+C to stop\n\n")
 
     try:
-        server.serve_forever(poll_interval=0.1)
+        server.serve_forever()
     except KeyboardInterrupt:
         sys.stderr.write("\nShutting down...\n")
         server.server_close()
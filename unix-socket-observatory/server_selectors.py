@@ -1,7 +1,7 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.10"
-# dependencies = ["pyyaml", "pygments"]
+# dependencies = ["pyyaml", "pygments", "orjson"]
 # ///
 """
 Claude Code Hooks Observatory - Unix Socket Server (Raw Selectors)
@@ -30,28 +30,48 @@ import selectors
 import socket
 import struct
 import sys
-from datetime import datetime, timezone
-from typing import Any
-from urllib.parse import parse_qs, urlparse
+import time
+from typing import Any, Callable
+from urllib.parse import unquote_plus
 
 import yaml
 from pygments import highlight
 from pygments.lexers import YamlLexer
 from pygments.formatters import Terminal256Formatter
 
+try:
+    import orjson
+except ImportError:  # plain `python server_selectors.py` without uv: stdlib json works too
+    orjson = None
+
 DEFAULT_SOCKET = "/tmp/claude-observatory.sock"
 ENV_SOCKET = "CLAUDE_UNIX_HOOK_WATCHER"
 
-# Module-level output mode (set from CLI args in main)
-_output_mode = "jsonl"
+# Bytes a reader may fall behind by before we give up on it and disconnect.
+READER_BUFFER_MAX = 16 * 1024 * 1024
+
+# Limits for input connections. A request whose headers or body would
+# exceed these is refused (connection closed) rather than buffered, and a
+# keep-alive connection that sends nothing for IDLE_TIMEOUT is reaped.
+HEADER_MAX = 64 * 1024
+BODY_MAX = 16 * 1024 * 1024
+IDLE_TIMEOUT = 60.0
+
 
+# Same dumper choice as server.py, so --pretty-yaml output is byte-identical
+# across the two servers (libyaml's emitter folds long lines differently).
+try:
+    from yaml import CSafeDumper as _BaseDumper
+except ImportError:
+    from yaml import SafeDumper as _BaseDumper
 
-class _MultilineYamlDumper(yaml.SafeDumper):
+
+class _MultilineYamlDumper(_BaseDumper):
     """YAML dumper that renders strings containing newlines as block scalars (|)."""
     pass
 
 
-def _str_representer(dumper: yaml.SafeDumper, data: str) -> yaml.Node:
+def _str_representer(dumper: _BaseDumper, data: str) -> yaml.Node:
     if "\n" in data:
         return dumper.represent_scalar("tag:yaml.org,2002:str", data, style="|")
     return dumper.represent_scalar("tag:yaml.org,2002:str", data)
@@ -59,22 +79,51 @@ def _str_representer(dumper: yaml.SafeDumper, data: str) -> yaml.Node:
 
 _MultilineYamlDumper.add_representer(str, _str_representer)
 
+# Built once: constructing a pygments lexer/formatter per event is expensive.
+_YAML_LEXER = YamlLexer()
+_YAML_FORMATTER = Terminal256Formatter()
+
+# Whether stdout is a terminal; checked once in main() (stdout doesn't change
+# mid-run). Decides YAML highlighting.
+_IS_TTY = False
+
+
+# (epoch second, formatted) for the last timestamp handed out.
+_ts_cache: tuple[int, str] = (-1, "")
+
 
 def get_timestamp() -> str:
-    """Return current UTC timestamp in ISO format."""
-    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+    """Return current UTC timestamp in ISO format (second resolution).
+
+    Cached per wall-clock second, as in server.py.
+    """
+    global _ts_cache
+    sec = int(time.time())
+    cached_sec, text = _ts_cache
+    if sec != cached_sec:
+        t = time.gmtime(sec)
+        text = "%04d-%02d-%02dT%02d:%02d:%02d+00:00" % t[:6]
+        _ts_cache = (sec, text)
+    return text
+
+
+# Precompiled credential struct layouts (see get_peer_creds).
+_UCRED = struct.Struct("3i")  # Linux struct ucred: pid, uid, gid
+_XUCRED = struct.Struct("IIh16I")  # macOS struct xucred
+_PEERPID = struct.Struct("I")  # macOS LOCAL_PEERPID: pid_t
 
 
 def get_peer_creds(sock: socket.socket) -> tuple[int, int, int] | None:
     """Get peer credentials (pid, uid, gid) from a Unix socket connection.
 
-    Identical to server.py's implementation - duplicated intentionally
-    so each file is standalone and readable without cross-file imports.
+    Same logic as server.py's per-platform helpers, kept in one function
+    here - duplicated intentionally so each file is standalone and
+    readable without cross-file imports.
     """
     try:
         SO_PEERCRED = 17
-        cred = sock.getsockopt(socket.SOL_SOCKET, SO_PEERCRED, struct.calcsize("3i"))
-        pid, uid, gid = struct.unpack("3i", cred)
+        cred = sock.getsockopt(socket.SOL_SOCKET, SO_PEERCRED, _UCRED.size)
+        pid, uid, gid = _UCRED.unpack(cred)
         # pid=0 means the socket isn't connected or isn't AF_UNIX
         if pid > 0:
             return (pid, uid, gid)
@@ -83,13 +132,13 @@ def get_peer_creds(sock: socket.socket) -> tuple[int, int, int] | None:
 
     try:
         LOCAL_PEERCRED = 0x001
-        buf = sock.getsockopt(socket.SOL_LOCAL, LOCAL_PEERCRED, struct.calcsize("IIh16I"))
-        _, uid, ngroups, *groups = struct.unpack("IIh16I", buf)
+        buf = sock.getsockopt(socket.SOL_LOCAL, LOCAL_PEERCRED, _XUCRED.size)
+        _, uid, ngroups, *groups = _XUCRED.unpack(buf)
         gid = groups[0] if ngroups > 0 else -1
         try:
             LOCAL_PEERPID = 0x002
-            pid_buf = sock.getsockopt(socket.SOL_LOCAL, LOCAL_PEERPID, struct.calcsize("I"))
-            pid = struct.unpack("I", pid_buf)[0]
+            pid_buf = sock.getsockopt(socket.SOL_LOCAL, LOCAL_PEERPID, _PEERPID.size)
+            (pid,) = _PEERPID.unpack(pid_buf)
         except (OSError, AttributeError):
             pid = -1
         return (pid, uid, gid)
@@ -99,42 +148,110 @@ def get_peer_creds(sock: socket.socket) -> tuple[int, int, int] | None:
     return None
 
 
+# First bytes a JSON object body can start with: "{" or leading whitespace.
+_OBJECT_START = frozenset(b"{ \t\r\n")
+
+
+def parse_body(body: bytes) -> dict[str, Any]:
+    """Decode a hook body as a JSON object, keeping anything else under _raw.
+
+    Same as server.py's version: a body that can't start an object skips
+    the parser, and valid JSON that isn't an object also lands in _raw.
+    """
+    if not body:
+        return {}
+    if body[0] in _OBJECT_START:
+        try:
+            payload = json_loads(body)
+        except ValueError:  # JSONDecodeError, or invalid UTF-8 under stdlib json
+            pass
+        else:
+            if isinstance(payload, dict):
+                return payload
+    return {"_raw": body.decode("utf-8", errors="replace")}
+
+
 def enrich_payload(
     payload: dict[str, Any], event: str, peer_creds: tuple[int, int, int] | None
 ) -> dict[str, Any]:
-    """Add metadata fields (prefixed with _) to the payload."""
-    result: dict[str, Any] = {
+    """Add metadata fields (prefixed with _) to the payload.
+
+    Built as one dict display, metadata first, so the result is sized once
+    instead of growing through update().
+    """
+    if peer_creds is None:
+        return {"_ts": get_timestamp(), "_event": event, **payload}
+    pid, uid, gid = peer_creds
+    return {
         "_ts": get_timestamp(),
         "_event": event,
+        "_peer_pid": pid,
+        "_peer_uid": uid,
+        "_peer_gid": gid,
+        **payload,
     }
-    if peer_creds is not None:
-        pid, uid, gid = peer_creds
-        result["_peer_pid"] = pid
-        result["_peer_uid"] = uid
-        result["_peer_gid"] = gid
-    result.update(payload)
-    return result
-
-
-def format_event(data: dict[str, Any]) -> str:
-    """Format a single event in the configured output format."""
-    match _output_mode:
-        case "pretty-yaml":
-            yaml_text = yaml.dump(
-                data, Dumper=_MultilineYamlDumper,
-                default_flow_style=False, sort_keys=False,
-            )
-            if sys.stdout.isatty():
-                return (
-                    "\033[90m---\033[0m\n"
-                    + highlight(yaml_text, YamlLexer(), Terminal256Formatter())
-                )
-            else:
-                return "---\n" + yaml_text
-        case "pretty-json":
-            return json.dumps(data, indent=2) + "\n"
-        case _:
-            return json.dumps(data, separators=(",", ":")) + "\n"
+
+
+def json_loads(body: bytes) -> Any:
+    """Parse JSON bytes (orjson when available; both raise json.JSONDecodeError)."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+# Compact separators bound once instead of re-parsing json.dumps kwargs per event.
+_COMPACT = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def json_bytes(data: Any, indent: bool = False, newline: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes: compact, or 2-space indented.
+
+    Same as server.py's version: orjson when available, which also appends
+    the newline during serialization instead of copying the line.
+    """
+    if orjson is not None:
+        option = orjson.OPT_INDENT_2 if indent else 0
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        return orjson.dumps(data, option=option)
+    text = json.dumps(data, indent=2) if indent else _COMPACT(data)
+    return (text + "\n" if newline else text).encode()
+
+
+def _encode_jsonl(data: dict[str, Any]) -> bytes:
+    """Compact single-line JSON (the default)."""
+    return json_bytes(data, newline=True)
+
+
+def _encode_pretty_json(data: dict[str, Any]) -> bytes:
+    """Indented multiline JSON."""
+    return json_bytes(data, indent=True, newline=True)
+
+
+def _encode_pretty_yaml(data: dict[str, Any]) -> bytes:
+    """YAML document with block scalars, highlighted on a terminal."""
+    yaml_text = yaml.dump(
+        data, Dumper=_MultilineYamlDumper,
+        default_flow_style=False, sort_keys=False,
+    )
+    if _IS_TTY:
+        return (
+            "\033[90m---\033[0m\n"
+            + highlight(yaml_text, _YAML_LEXER, _YAML_FORMATTER)
+        ).encode()
+    return ("---\n" + yaml_text).encode()
+
+
+_ENCODERS = {
+    "jsonl": _encode_jsonl,
+    "pretty-json": _encode_pretty_json,
+    "pretty-yaml": _encode_pretty_yaml,
+}
+
+# Format a single event in the configured output format, as UTF-8 bytes.
+# Rebound once in main() from the CLI flags (as in server.py), so there's no
+# per-event mode dispatch.
+format_event = _encode_jsonl
 
 
 # === HTTP Parsing ===
@@ -142,7 +259,7 @@ def format_event(data: dict[str, Any]) -> str:
 # what the "parse HTTP request" step actually involves.
 
 
-def parse_http_request(data: bytes) -> tuple[str, str, str, dict[str, str]]:
+def parse_http_request(data: bytes) -> tuple[str, str, bytes, dict[bytes, bytes]]:
     """Parse a raw HTTP request into (method, path, body, headers).
 
     HTTP/1.1 requests look like:
@@ -152,36 +269,59 @@ def parse_http_request(data: bytes) -> tuple[str, str, str, dict[str, str]]:
         \\r\\n
         {"tool_name": "Bash"}
 
-    The \\r\\n\\r\\n separates headers from body.
+    The \\r\\n\\r\\n separates headers from body. The body stays bytes:
+    it may be incomplete (see handle_input_connection), and json.loads
+    reads bytes directly. Header names (lowercased) and values stay bytes
+    too; only the request line is decoded.
     """
     # Split headers from body at the blank line
     header_end = data.find(b"\r\n\r\n")
     if header_end == -1:
         # No complete headers yet - treat entire thing as headers
-        header_section = data.decode("utf-8", errors="replace")
-        body = ""
+        header_end = len(data)
+        body = b""
     else:
-        header_section = data[:header_end].decode("utf-8", errors="replace")
-        body = data[header_end + 4:].decode("utf-8", errors="replace")
-
-    lines = header_section.split("\r\n")
+        body = data[header_end + 4:]
 
     # First line: "POST /hook?event=PreToolUse HTTP/1.1"
-    request_line = lines[0] if lines else ""
-    parts = request_line.split(" ", 2)
-    method = parts[0] if len(parts) >= 1 else ""
+    line_end = data.find(b"\r\n", 0, header_end)
+    if line_end == -1:
+        line_end = header_end
+    parts = data[:line_end].decode("utf-8", errors="replace").split(" ", 2)
+    method = parts[0]
     path = parts[1] if len(parts) >= 2 else "/"
 
-    # Remaining lines are headers: "Key: Value"
-    headers: dict[str, str] = {}
-    for line in lines[1:]:
-        if ": " in line:
-            key, value = line.split(": ", 1)
-            headers[key.lower()] = value
+    # Remaining lines are headers: "Key: Value", split on the first colon
+    # with any spaces/tabs around the value trimmed. Everything stays bytes
+    # (no decode); partition() measured faster than a regex scan. Names are
+    # bytes, so .lower() only maps A-Z (no Unicode tables); it measured
+    # faster than bytes.translate() with a lowercase table.
+    headers: dict[bytes, bytes] = {}
+    for line in data[line_end + 2:header_end].split(b"\r\n"):
+        key, sep, value = line.partition(b":")
+        if sep:
+            headers[key.lower()] = value.strip(b" \t")
 
     return method, path, body, headers
 
 
+def parse_event(path: str) -> str:
+    """Extract the `event` query parameter from a request path.
+
+    Same as server.py's version: slice the value out of /hook?event=X
+    directly rather than building urlparse/parse_qs structures.
+    """
+    i = path.find("?event=")
+    if i < 0:
+        i = path.find("&event=")
+        if i < 0:
+            return "Unknown"
+    event = path[i + 7:].partition("&")[0]
+    if "%" in event or "+" in event:
+        event = unquote_plus(event)
+    return event or "Unknown"
+
+
 def build_http_response(status: int, body: str = "") -> bytes:
     """Build a raw HTTP/1.1 response.
 
@@ -192,12 +332,39 @@ def build_http_response(status: int, body: str = "") -> bytes:
         \\r\\n
     """
     reason = {200: "OK", 404: "Not Found"}.get(status, "Unknown")
-    response = f"HTTP/1.1 {status} {reason}\r\n"
-    response += "Content-Type: application/json\r\n"
-    response += f"Content-Length: {len(body)}\r\n"
-    response += "\r\n"
-    response += body
-    return response.encode()
+    payload = body.encode()
+    head = (
+        f"HTTP/1.1 {status} {reason}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "\r\n"
+    )
+    return head.encode() + payload
+
+
+# The only responses this server ever sends. Built once at import so the
+# request path just hands a ready-made bytes object to sendall().
+_RESP_200_EMPTY = build_http_response(200)
+_RESP_404 = build_http_response(404)
+_RESP_200_HEALTH = build_http_response(200, json.dumps({"status": "ok"}))
+
+# Request-line start of a liveness probe, answered without parsing headers.
+_HEALTH_PREFIX = b"GET /health "
+
+
+def accept_all(listener: socket.socket) -> list[socket.socket]:
+    """Accept every connection already queued on a non-blocking listener.
+
+    One select() wakeup can stand for many connect()s in a burst; draining
+    them all here saves a trip through select() per connection.
+    """
+    conns: list[socket.socket] = []
+    while True:
+        try:
+            conn, _ = listener.accept()
+        except OSError:  # BlockingIOError: queue is empty
+            return conns
+        conns.append(conn)
 
 
 def parse_args() -> argparse.Namespace:
@@ -266,14 +433,15 @@ def main() -> None:
     - Input socket → accept new connections, read HTTP, respond
     - Output socket → accept reader connections
     """
-    global _output_mode
+    global format_event, _IS_TTY
     args = parse_args()
     socket_path = get_socket_path(args.socket)
 
     if args.pretty_yaml:
-        _output_mode = "pretty-yaml"
+        format_event = _ENCODERS["pretty-yaml"]
     elif args.pretty_json:
-        _output_mode = "pretty-json"
+        format_event = _ENCODERS["pretty-json"]
+    _IS_TTY = sys.stdout.isatty()
 
     if args.tee and not args.output_socket:
         sys.stderr.write("Error: --tee requires --output-socket\n")
@@ -291,7 +459,8 @@ def main() -> None:
 
     # === Create the output socket (optional) ===
     output_sock: socket.socket | None = None
-    output_clients: list[socket.socket] = []
+    # Each reader gets its own pending-output buffer (see _write_to_clients)
+    output_clients: dict[socket.socket, bytearray] = {}
     if args.output_socket:
         if os.path.exists(args.output_socket):
             os.unlink(args.output_socket)
@@ -309,96 +478,210 @@ def main() -> None:
     if output_sock:
         sel.register(output_sock, selectors.EVENT_READ, data="output_listener")
 
-    def write_output(line: str) -> None:
-        """Send formatted output to configured destinations."""
-        if args.output_socket and not args.tee:
-            _write_to_clients(line)
-        elif args.output_socket and args.tee:
-            sys.stdout.write(line)
-            sys.stdout.flush()
-            _write_to_clients(line)
-        else:
-            sys.stdout.write(line)
-            sys.stdout.flush()
-
-    def _write_to_clients(line: str) -> None:
-        """Send data to all connected output readers."""
-        dead: list[socket.socket] = []
-        data = line.encode()
-        for client in output_clients:
-            try:
-                client.sendall(data)
-            except (BrokenPipeError, OSError):
-                dead.append(client)
-        for client in dead:
-            output_clients.remove(client)
-            client.close()
+    to_stdout = not args.output_socket or args.tee
+    stdout = sys.stdout.buffer
+
+    def _queue_for_readers(data: bytes) -> None:
+        """Append a line to every reader's pending buffer."""
+        for pending in output_clients.values():
+            pending += data
+
+    def _queue_for_both(data: bytes) -> None:
+        """--tee: queue a line for stdout and for every reader."""
+        stdout.write(data)
+        for pending in output_clients.values():
+            pending += data
+
+    # Queue formatted output for the configured destinations, picked once
+    # from the CLI flags so there's no per-event mode check. Nothing is sent
+    # yet: stdout's BufferedWriter and each reader's pending buffer collect
+    # every line produced in one pass of the event loop, and flush_output()
+    # then sends them with one write per destination instead of one per event.
+    write_output: Callable[[bytes], object]
+    if not args.output_socket:
+        write_output = stdout.write
+    elif args.tee:
+        write_output = _queue_for_both
+    else:
+        write_output = _queue_for_readers
 
-    def handle_input_connection(conn: socket.socket) -> None:
-        """Read HTTP request, process hook event, send HTTP response.
+    def flush_output() -> None:
+        """Send everything write_output() queued (once per loop pass).
 
-        This is what BaseHTTPRequestHandler does automatically.
-        Here we do each step manually.
+        Reader sockets are non-blocking, so sendall() would raise as soon as
+        a reader's kernel buffer filled. Instead, whatever doesn't fit stays
+        in that reader's buffer and the selector tells us (EVENT_WRITE) when
+        to try again. One slow reader never holds up the others.
         """
-        # Read the full request (hook payloads are small, so one recv suffices)
+        if to_stdout:
+            stdout.flush()
+        watched = sel.get_map()
+        for client, pending in list(output_clients.items()):
+            if len(pending) >= READER_BUFFER_MAX:
+                _drop_client(client)
+            elif pending and client not in watched:
+                _flush_client(client)
+
+    def _flush_client(client: socket.socket) -> None:
+        """Send as much of a reader's buffer as its kernel buffer accepts."""
+        pending = output_clients[client]
         try:
-            raw = conn.recv(65536)
+            sent = client.send(pending)
+        except BlockingIOError:
+            sent = 0
         except OSError:
-            conn.close()
+            _drop_client(client)
             return
+        del pending[:sent]
+        watching = client in sel.get_map()
+        if pending and not watching:
+            sel.register(client, selectors.EVENT_WRITE, data="output_client")
+        elif not pending and watching:
+            sel.unregister(client)  # Caught up; stop watching for EVENT_WRITE
+
+    def _drop_client(client: socket.socket) -> None:
+        """Forget a closed or stalled reader."""
+        del output_clients[client]
+        if client in sel.get_map():
+            sel.unregister(client)
+        client.close()
+        sys.stderr.write(f"Output reader disconnected ({len(output_clients)} total)\n")
+
+    # Receive buffer and peer credentials per open input connection.
+    # Connections stay registered after a response (HTTP/1.1 keep-alive),
+    # and bytes past the end of one request stay buffered for the next
+    # (pipelining). The kernel records credentials at connect() time, so
+    # they're read once on accept and reused for every request.
+    input_conns: dict[socket.socket, tuple[bytearray, tuple[int, int, int] | None]] = {}
+    # When each input connection last sent bytes (time.monotonic()).
+    input_last_seen: dict[socket.socket, float] = {}
+
+    # One scratch buffer that every recv_into() fills. The loop is single-
+    # threaded, so it's reused for all connections instead of allocating a
+    # fresh 64 KB bytes object per recv().
+    recv_view = memoryview(bytearray(65536))
+
+    def close_input_connection(conn: socket.socket) -> None:
+        """Stop watching an input connection and close it."""
+        sel.unregister(conn)
+        del input_conns[conn]
+        del input_last_seen[conn]
+        conn.close()
 
-        if not raw:
-            conn.close()
-            return
+    def reap_idle_connections(now: float) -> None:
+        """Close keep-alive connections that have gone quiet."""
+        for conn, last_seen in list(input_last_seen.items()):
+            if now - last_seen > IDLE_TIMEOUT:
+                close_input_connection(conn)
 
-        # Parse the raw HTTP bytes into components
-        method, path, body, headers = parse_http_request(raw)
+    def handle_input_connection(conn: socket.socket) -> None:
+        """Read HTTP requests, process hook events, send HTTP responses.
 
-        if method == "GET" and path == "/health":
-            response_body = json.dumps({"status": "ok"})
-            conn.sendall(build_http_response(200, response_body))
-            conn.close()
+        This is what BaseHTTPRequestHandler does automatically.
+        Here we do each step manually. Called each time conn is readable:
+        every complete request buffered so far is answered, and a partial
+        one waits in the buffer for the next call instead of blocking.
+        """
+        try:
+            n = conn.recv_into(recv_view)
+        except OSError:
+            close_input_connection(conn)
             return
 
-        if method != "POST":
-            conn.sendall(build_http_response(404))
-            conn.close()
+        if not n:
+            # Client closed its end (it's done sending requests)
+            close_input_connection(conn)
             return
 
-        # Extract event type from query string
-        parsed = urlparse(path)
-        query = parse_qs(parsed.query)
-        event = query.get("event", ["Unknown"])[0]
-
-        # If body is shorter than Content-Length, read more
-        expected_len = int(headers.get("content-length", "0"))
-        while len(body.encode()) < expected_len:
+        buf, peer_creds = input_conns[conn]
+        buf += recv_view[:n]
+        input_last_seen[conn] = time.monotonic()
+        while True:
+            header_end = buf.find(b"\r\n\r\n")
+            if header_end == -1:
+                if len(buf) > HEADER_MAX:
+                    close_input_connection(conn)  # Not HTTP, or abusive
+                return  # Headers incomplete; wait for more bytes
+
+            if buf.startswith(_HEALTH_PREFIX):
+                # Liveness probe: reply with the cached bytes and hang up,
+                # so there's nothing left to frame and no headers to parse.
+                try:
+                    conn.sendall(_RESP_200_HEALTH)
+                except OSError:
+                    pass
+                close_input_connection(conn)
+                return
+
+            # Parse the raw HTTP bytes into components
+            method, path, _, headers = parse_http_request(bytes(buf[:header_end + 4]))
+
+            # int() takes the raw header bytes, so there's nothing to decode.
+            # A negative length would never consume the request (the loop
+            # would answer it forever), and a huge one would buffer without
+            # bound; both get the connection closed, like a malformed one.
+            try:
+                body_len = int(headers.get(b"content-length", b"0"))
+            except ValueError:
+                body_len = -1
+            if not 0 <= body_len <= BODY_MAX:
+                close_input_connection(conn)
+                return
+            body_start = header_end + 4
+            body_end = body_start + body_len
+            if len(buf) < body_end:
+                return  # Body incomplete; wait for more bytes
+            body = bytes(buf[body_start:body_end])
+            request_line = bytes(buf[:buf.find(b"\r\n")])
+            del buf[:body_end]
+
+            # Route, and answer before doing the event's work: the hook's
+            # response is always an empty 200, so the caller needn't wait
+            # for JSON parsing, formatting and output.
+            response = _RESP_200_EMPTY if method == "POST" else _RESP_404
             try:
-                more = conn.recv(65536)
-                if not more:
-                    break
-                body += more.decode("utf-8", errors="replace")
+                conn.sendall(response)
+                sent = True
             except OSError:
-                break
+                sent = False  # Client already gone; the event still counts
+            if method == "POST":
+                process_event(path, body, peer_creds)
+
+            # HTTP/1.1 keeps the connection open unless the client sends
+            # "Connection: close"; HTTP/1.0 closes it unless the client
+            # asks for "Connection: keep-alive" (what BaseHTTPRequestHandler
+            # does too). The version is the request line's last word.
+            connection = headers.get(b"connection", b"").lower()
+            if request_line.endswith(b" HTTP/1.0"):
+                keep_alive = connection == b"keep-alive"
+            else:
+                keep_alive = connection != b"close"
+            if not sent or not keep_alive:
+                close_input_connection(conn)
+                return
+
+    def process_event(
+        path: str, body: bytes, peer_creds: tuple[int, int, int] | None
+    ) -> None:
+        """Turn one hook POST into an output line (the part do_POST does).
+
+        With only an output socket configured and no reader connected, the
+        line would go nowhere, so the event is dropped before any work.
+        """
+        if not to_stdout and not output_clients:
+            return
 
-        # Parse JSON payload
-        try:
-            payload = json.loads(body) if body else {}
-        except json.JSONDecodeError:
-            payload = {"_raw": body}
+        # Extract event type from query string
+        event = parse_event(path)
 
-        # Get peer credentials
-        peer_creds = get_peer_creds(conn)
+        # Parse JSON payload
+        payload = parse_body(body)
 
         # Enrich and output
         enriched = enrich_payload(payload, event, peer_creds)
         formatted = format_event(enriched)
         write_output(formatted)
 
-        # Send HTTP 200 response (no-op)
-        conn.sendall(build_http_response(200))
-        conn.close()
-
     sys.stderr.write(
         f"Claude Code Hooks Observatory (Selectors) listening on {socket_path}\n"
     )
@@ -408,34 +691,52 @@ def main() -> None:
     # === Main event loop ===
     # This replaces HTTPServer.serve_forever(). The selector blocks until
     # any registered socket has data, then we dispatch to the right handler.
+    next_reap = 0.0
     try:
         while True:
             events = sel.select(timeout=1.0)
             for key, mask in events:
                 if key.data == "input_listener":
-                    # New input connection (like HTTPServer.get_request())
-                    try:
-                        conn, _ = input_sock.accept()
-                        handle_input_connection(conn)
-                    except OSError:
-                        pass
+                    # New input connections (like HTTPServer.get_request()).
+                    # Watch each until the client sends a request.
+                    for conn in accept_all(input_sock):
+                        input_conns[conn] = (bytearray(), get_peer_creds(conn))
+                        input_last_seen[conn] = time.monotonic()
+                        sel.register(conn, selectors.EVENT_READ, data="input_conn")
+
+                elif key.data == "input_conn":
+                    # Request bytes (or EOF) on an open input connection
+                    handle_input_connection(key.fileobj)  # type: ignore[arg-type]
 
                 elif key.data == "output_listener":
-                    # New output reader connecting
-                    try:
-                        client, _ = output_sock.accept()  # type: ignore[union-attr]
+                    # New output readers connecting
+                    for client in accept_all(output_sock):  # type: ignore[arg-type]
                         client.setblocking(False)
-                        output_clients.append(client)
+                        output_clients[client] = bytearray()
                         sys.stderr.write(
                             f"Output reader connected ({len(output_clients)} total)\n"
                         )
-                    except (OSError, BlockingIOError):
-                        pass
+
+                elif key.data == "output_client":
+                    # A backed-up reader has room again
+                    _flush_client(key.fileobj)  # type: ignore[arg-type]
+
+            # Everything this pass produced goes out together
+            flush_output()
+
+            # select() returns at least once a second, so idle keep-alive
+            # connections are noticed within a second of their deadline
+            now = time.monotonic()
+            if now >= next_reap:
+                reap_idle_connections(now)
+                next_reap = now + 1.0
 
     except KeyboardInterrupt:
         sys.stderr.write("\nShutting down...\n")
     finally:
         sel.close()
+        for conn in input_conns:
+            conn.close()
         input_sock.close()
         if os.path.exists(socket_path):
             os.unlink(socket_path)
@@ -1,7 +1,7 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.10"
-# dependencies = ["pytest", "pyyaml", "pygments"]
+# dependencies = ["pytest", "pyyaml", "pygments", "orjson"]
 # ///
 """
 Claude Code Hooks Observatory (Unix Socket) - Tests
@@ -17,13 +17,17 @@ Usage:
 
 from __future__ import annotations
 
+import http.client
 import io
+import itertools
 import json
 import os
+import re
+import selectors
 import socket
 import sys
 import tempfile
-from datetime import datetime
+from datetime import datetime, timezone
 from threading import Thread
 from typing import Any, Generator
 from unittest.mock import patch
@@ -41,73 +45,100 @@ from server import (
     get_peer_creds,
     get_socket_path,
     get_timestamp,
+    parse_body,
+    parse_event,
     DEFAULT_SOCKET,
     ENV_SOCKET,
 )
 
 
-def make_temp_socket_path() -> str:
-    """Create a temporary path for a Unix socket.
+# Shape of an ISO 8601 timestamp with an explicit UTC offset (or Z).
+ISO_TIMESTAMP = re.compile(
+    r"\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})"
+)
+
+
+def capture_stdout() -> Any:
+    """Patch sys.stdout with a text stream whose .buffer collects bytes.
 
-    We use tempfile.mktemp (not mkstemp) because we need a path that
-    doesn't exist yet - the socket will be created by the server.
+    OutputManager writes encoded bytes to sys.stdout.buffer, which a plain
+    io.StringIO doesn't have.
     """
-    return tempfile.mktemp(suffix=".sock", prefix="test-observatory-")
+    return patch("sys.stdout", new=io.TextIOWrapper(io.BytesIO(), encoding="utf-8"))
 
 
-def make_request(
-    socket_path: str, method: str, path: str, body: str = ""
-) -> tuple[int, str]:
-    """Make an HTTP request over a Unix socket.
+_socket_ids = itertools.count()
+
 
-    stdlib http.client doesn't support Unix sockets, so we build
-    the raw HTTP request and parse the response manually.
+def make_temp_socket_path() -> str:
+    """Return a fresh path for a Unix socket.
+
+    The server creates the socket itself, so we need a path that doesn't
+    exist yet. The pid keeps parallel test processes apart and the counter
+    keeps paths unique within one run, without tempfile.mktemp's deprecated
+    existence probing.
     """
-    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-    sock.connect(socket_path)
-
-    # Build raw HTTP request
-    request = f"{method} {path} HTTP/1.1\r\n"
-    request += "Host: localhost\r\n"
-    if body:
-        request += "Content-Type: application/json\r\n"
-        request += f"Content-Length: {len(body)}\r\n"
-    request += "\r\n"
-    request += body
-
-    sock.sendall(request.encode())
-
-    # Read response
-    response = b""
-    while True:
-        chunk = sock.recv(4096)
+    path = os.path.join(
+        tempfile.gettempdir(), f"test-observatory-{os.getpid()}-{next(_socket_ids)}.sock"
+    )
+    try:
+        os.unlink(path)  # left over from an earlier process with our pid
+    except FileNotFoundError:
+        pass
+    return path
+
+
+def reader_line(reader: socket.socket) -> bytes:
+    """Read one newline-terminated line from an output socket reader."""
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = reader.recv(4096)
         if not chunk:
             break
-        response += chunk
-        # Check if we got a complete response (headers + body)
-        if b"\r\n\r\n" in response:
-            header_end = response.index(b"\r\n\r\n")
-            headers = response[:header_end].decode()
-            # Find Content-Length
-            content_length = 0
-            for line in headers.split("\r\n"):
-                if line.lower().startswith("content-length:"):
-                    content_length = int(line.split(":")[1].strip())
-            body_start = header_end + 4
-            if len(response) >= body_start + content_length:
-                break
+        data += chunk
+    return data
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """http.client connection that dials a Unix socket instead of host:port.
+
+    Only connect() changes; request framing and response parsing are
+    stock http.client.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 5.0) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
 
-    sock.close()
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
 
-    # Parse status code from first line: "HTTP/1.1 200 OK"
-    status_line = response.split(b"\r\n")[0].decode()
-    status_code = int(status_line.split(" ")[1])
 
-    # Parse body
-    body_start = response.index(b"\r\n\r\n") + 4
-    response_body = response[body_start:].decode()
+# http.client only reads this mapping, so one instance serves every request.
+JSON_HEADERS = {"Content-Type": "application/json"}
 
-    return status_code, response_body
+
+def json_payload(data: dict[str, Any]) -> bytes:
+    """Encode a test payload once, as the bytes make_request sends as-is."""
+    return json.dumps(data).encode()
+
+
+def make_request(
+    socket_path: str, method: str, path: str, body: str | bytes = b""
+) -> tuple[int, str]:
+    """Make an HTTP request over a Unix socket; return (status, body text)."""
+    if isinstance(body, str):
+        body = body.encode()  # http.client would encode str as Latin-1
+    headers = JSON_HEADERS if body else {}
+    conn = UnixHTTPConnection(socket_path)
+    try:
+        conn.request(method, path, body=body or None, headers=headers)
+        response = conn.getresponse()
+        return response.status, response.read().decode()
+    finally:
+        conn.close()
 
 
 class TestEnrichPayload:
@@ -116,8 +147,7 @@ class TestEnrichPayload:
     def test_adds_timestamp(self) -> None:
         """Enriched payload includes _ts field."""
         result = enrich_payload({}, "TestEvent", None)
-        assert "_ts" in result
-        datetime.fromisoformat(result["_ts"].replace("Z", "+00:00"))
+        assert ISO_TIMESTAMP.fullmatch(result["_ts"])
 
     def test_adds_event_type(self) -> None:
         """Enriched payload includes _event from query param."""
@@ -152,6 +182,56 @@ class TestEnrichPayload:
         assert set(metadata_keys) == {"_ts", "_event", "_peer_pid", "_peer_uid", "_peer_gid"}
 
 
+class TestParseEvent:
+    """Test extraction of ?event= from the request path."""
+
+    def test_simple(self) -> None:
+        """Plain hook URL yields the event name."""
+        assert parse_event("/hook?event=PreToolUse") == "PreToolUse"
+
+    def test_other_params(self) -> None:
+        """event= is found among other query parameters."""
+        assert parse_event("/hook?x=1&event=Stop&y=2") == "Stop"
+
+    def test_percent_decoded(self) -> None:
+        """Percent-encoded values are decoded like parse_qs would."""
+        assert parse_event("/hook?event=My%20Event") == "My Event"
+
+    def test_missing_is_unknown(self) -> None:
+        """Missing, empty, or look-alike parameters give 'Unknown'."""
+        assert parse_event("/hook") == "Unknown"
+        assert parse_event("/hook?event=") == "Unknown"
+        assert parse_event("/hook?myevent=Stop") == "Unknown"
+
+
+class TestParseBody:
+    """Test hook body decoding."""
+
+    def test_object(self) -> None:
+        """A JSON object body becomes the payload (bytes or memoryview)."""
+        assert parse_body(b'{"a": 1}') == {"a": 1}
+        assert parse_body(memoryview(b' {"a": 1}')) == {"a": 1}
+
+    def test_empty(self) -> None:
+        """An empty body is an empty payload."""
+        assert parse_body(b"") == {}
+
+    def test_invalid_json_is_raw(self) -> None:
+        """Bodies that aren't JSON are kept as text under _raw."""
+        assert parse_body(b"not json") == {"_raw": "not json"}
+        assert parse_body(b"{broken") == {"_raw": "{broken"}
+
+    def test_non_object_json_is_raw(self) -> None:
+        """Valid JSON that isn't an object is kept under _raw too."""
+        assert parse_body(b"[1, 2]") == {"_raw": "[1, 2]"}
+        assert parse_body(b" 42") == {"_raw": " 42"}
+
+    def test_invalid_utf8_is_raw(self) -> None:
+        """Bytes that aren't UTF-8 are kept under _raw, with or without orjson."""
+        assert parse_body(b"\xff") == {"_raw": "\ufffd"}
+        assert parse_body(b'{"a": "\xff"}') == {"_raw": '{"a": "\ufffd"}'}
+
+
 class TestOutputFormat:
     """Test output format."""
 
@@ -159,7 +239,7 @@ class TestOutputFormat:
         """Default format is compact single-line JSON."""
         data = {"key": "value", "nested": {"a": 1}}
         output = format_event(data)
-        assert output.count("\n") == 1
+        assert output.count(b"\n") == 1
 
     def test_jsonl_is_valid_json(self) -> None:
         """Output can be parsed as JSON."""
@@ -172,27 +252,32 @@ class TestOutputFormat:
         """No unnecessary whitespace in default output."""
         data = {"a": 1, "b": 2}
         output = format_event(data).strip()
-        assert " " not in output
+        assert b" " not in output
 
 
 class TestSocketConfiguration:
     """Test socket path precedence: CLI > env > default."""
 
-    def test_default_socket(self) -> None:
-        """Uses default path when no override provided."""
-        with patch.dict(os.environ, {}, clear=True):
-            os.environ.pop(ENV_SOCKET, None)
-            assert get_socket_path(None) == DEFAULT_SOCKET
-
-    def test_env_var_socket(self) -> None:
-        """Environment variable overrides default."""
-        with patch.dict(os.environ, {ENV_SOCKET: "/tmp/custom.sock"}):
-            assert get_socket_path(None) == "/tmp/custom.sock"
-
-    def test_cli_overrides_env(self) -> None:
-        """CLI argument overrides environment variable."""
-        with patch.dict(os.environ, {ENV_SOCKET: "/tmp/env.sock"}):
-            assert get_socket_path("/tmp/cli.sock") == "/tmp/cli.sock"
+    @pytest.mark.parametrize(
+        ("env", "cli", "expected"),
+        [
+            ({}, None, DEFAULT_SOCKET),
+            ({ENV_SOCKET: "/tmp/custom.sock"}, None, "/tmp/custom.sock"),
+            ({ENV_SOCKET: "/tmp/env.sock"}, "/tmp/cli.sock", "/tmp/cli.sock"),
+        ],
+        ids=["default", "env_overrides_default", "cli_overrides_env"],
+    )
+    def test_socket_precedence(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        env: dict[str, str],
+        cli: str | None,
+        expected: str,
+    ) -> None:
+        monkeypatch.delenv(ENV_SOCKET, raising=False)
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        assert get_socket_path(cli) == expected
 
 
 class TestGetTimestamp:
@@ -200,15 +285,20 @@ class TestGetTimestamp:
 
     def test_returns_iso_format(self) -> None:
         """Timestamp is in ISO format."""
-        ts = get_timestamp()
-        parsed = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-        assert parsed is not None
+        assert ISO_TIMESTAMP.fullmatch(get_timestamp())
 
     def test_includes_timezone(self) -> None:
         """Timestamp includes timezone info."""
         ts = get_timestamp()
         assert "+00:00" in ts or ts.endswith("Z")
 
+    def test_matches_datetime_isoformat(self) -> None:
+        """Cached timestamp has the same shape as datetime's isoformat()."""
+        before = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        ts = get_timestamp()
+        after = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        assert before <= ts <= after
+
 
 class TestPeerCredentials:
     """Test SO_PEERCRED extraction via a real Unix socket pair."""
@@ -250,28 +340,34 @@ class TestPeerCredentials:
         tcp_sock.close()
 
 
+@pytest.fixture(scope="module")
+def server() -> Generator[tuple[UnixHTTPServer, str], None, None]:
+    """One test server on a temporary Unix socket, shared by the module.
+
+    The endpoint tests are stateless (each checks only its own response),
+    so they don't need a fresh socket and thread apiece. A test that needs
+    isolation can define its own `server` fixture.
+    """
+    path = make_temp_socket_path()
+    output_mgr = OutputManager(None, False)
+    srv = UnixHTTPServer(path, HookHandler, 0o660, output_mgr)
+    # serve_forever blocks in select() and shutdown() wakes it directly,
+    # so there is no poll interval to tune.
+    Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv, path
+    srv.shutdown()
+    srv.server_close()
+
+
 class TestHookEndpoint:
     """Test the /hook endpoint via Unix socket."""
 
-    @pytest.fixture
-    def server(self) -> Generator[tuple[UnixHTTPServer, str], None, None]:
-        """Create a test server on a temporary Unix socket."""
-        path = make_temp_socket_path()
-        output_mgr = OutputManager(None, False)
-        srv = UnixHTTPServer(path, HookHandler, 0o660, output_mgr)
-        thread = Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05})
-        thread.daemon = True
-        thread.start()
-        yield srv, path
-        srv.shutdown()
-        srv.server_close()
-
     def test_pre_tool_use_returns_empty_200(
         self, server: tuple[UnixHTTPServer, str]
     ) -> None:
         """PreToolUse: returns 200 with empty body (no-op)."""
         _, path = server
-        payload = json.dumps({"tool_name": "Bash", "tool_input": {"command": "ls"}})
+        payload = json_payload({"tool_name": "Bash", "tool_input": {"command": "ls"}})
         status, body = make_request(path, "POST", "/hook?event=PreToolUse", payload)
         assert status == 200
         assert body == ""
@@ -281,7 +377,7 @@ class TestHookEndpoint:
     ) -> None:
         """PostToolUse: returns 200 with empty body (no-op)."""
         _, path = server
-        payload = json.dumps({"tool_name": "Read", "tool_response": {"content": "..."}})
+        payload = json_payload({"tool_name": "Read", "tool_response": {"content": "..."}})
         status, body = make_request(path, "POST", "/hook?event=PostToolUse", payload)
         assert status == 200
         assert body == ""
@@ -291,7 +387,7 @@ class TestHookEndpoint:
     ) -> None:
         """SessionStart: returns 200 with empty body (no-op)."""
         _, path = server
-        payload = json.dumps({"source": "startup", "model": "claude-sonnet-4-5"})
+        payload = json_payload({"source": "startup", "model": "claude-sonnet-4-5"})
         status, body = make_request(path, "POST", "/hook?event=SessionStart", payload)
         assert status == 200
         assert body == ""
@@ -301,7 +397,7 @@ class TestHookEndpoint:
     ) -> None:
         """SessionEnd: returns 200 with empty body (no-op)."""
         _, path = server
-        payload = json.dumps({"reason": "logout"})
+        payload = json_payload({"reason": "logout"})
         status, body = make_request(path, "POST", "/hook?event=SessionEnd", payload)
         assert status == 200
         assert body == ""
@@ -311,7 +407,7 @@ class TestHookEndpoint:
     ) -> None:
         """Notification: returns 200 with empty body (no-op)."""
         _, path = server
-        payload = json.dumps({"message": "test", "notification_type": "permission_prompt"})
+        payload = json_payload({"message": "test", "notification_type": "permission_prompt"})
         status, body = make_request(path, "POST", "/hook?event=Notification", payload)
         assert status == 200
         assert body == ""
@@ -321,7 +417,7 @@ class TestHookEndpoint:
     ) -> None:
         """Stop: returns 200 with empty body (no-op)."""
         _, path = server
-        payload = json.dumps({"stop_hook_active": True})
+        payload = json_payload({"stop_hook_active": True})
         status, body = make_request(path, "POST", "/hook?event=Stop", payload)
         assert status == 200
         assert body == ""
@@ -331,7 +427,7 @@ class TestHookEndpoint:
     ) -> None:
         """PermissionRequest: returns 200 with empty body (no-op)."""
         _, path = server
-        payload = json.dumps({"tool_name": "Bash", "tool_input": {"command": "rm -rf /"}})
+        payload = json_payload({"tool_name": "Bash", "tool_input": {"command": "rm -rf /"}})
         status, body = make_request(path, "POST", "/hook?event=PermissionRequest", payload)
         assert status == 200
         assert body == ""
@@ -341,7 +437,7 @@ class TestHookEndpoint:
     ) -> None:
         """UserPromptSubmit: returns 200 with empty body (no-op)."""
         _, path = server
-        payload = json.dumps({"prompt": "Hello, Claude!"})
+        payload = json_payload({"prompt": "Hello, Claude!"})
         status, body = make_request(path, "POST", "/hook?event=UserPromptSubmit", payload)
         assert status == 200
         assert body == ""
@@ -350,19 +446,6 @@ class TestHookEndpoint:
 class TestHealthEndpoint:
     """Test the /health endpoint via Unix socket."""
 
-    @pytest.fixture
-    def server(self) -> Generator[tuple[UnixHTTPServer, str], None, None]:
-        """Create a test server on a temporary Unix socket."""
-        path = make_temp_socket_path()
-        output_mgr = OutputManager(None, False)
-        srv = UnixHTTPServer(path, HookHandler, 0o660, output_mgr)
-        thread = Thread(target=srv.serve_forever, kwargs={"poll_interval": 0.05})
-        thread.daemon = True
-        thread.start()
-        yield srv, path
-        srv.shutdown()
-        srv.server_close()
-
     def test_health_returns_ok(
         self, server: tuple[UnixHTTPServer, str]
     ) -> None:
@@ -377,53 +460,84 @@ class TestHealthEndpoint:
 class TestOutputManager:
     """Test OutputManager stdout/socket/tee modes."""
 
-    def test_stdout_by_default(self) -> None:
-        """Without output socket, writes to stdout."""
-        mgr = OutputManager(None, False)
-        with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
-            mgr.write('{"test":1}\n')
-            assert mock_stdout.getvalue() == '{"test":1}\n'
-        mgr.cleanup()
-
-    def test_output_socket_replaces_stdout(self) -> None:
-        """With output socket (no tee), stdout gets nothing."""
-        out_path = make_temp_socket_path()
-        mgr = OutputManager(out_path, tee=False)
+    @pytest.mark.parametrize(
+        ("with_socket", "tee", "expect_stdout"),
+        [(False, False, True), (True, False, False), (True, True, True)],
+        ids=["stdout_by_default", "socket_replaces_stdout", "tee"],
+    )
+    def test_output_modes(self, with_socket: bool, tee: bool, expect_stdout: bool) -> None:
+        """stdout by default; an output socket replaces it unless --tee."""
+        out_path = make_temp_socket_path() if with_socket else None
+        mgr = OutputManager(out_path, tee)
+        reader: socket.socket | None = None
         try:
-            # Connect a reader
-            reader = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            reader.connect(out_path)
-            mgr.accept_pending()
-
-            with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
-                mgr.write('{"test":1}\n')
-                # stdout should be empty
-                assert mock_stdout.getvalue() == ""
-
-            # Reader should have received the data
-            data = reader.recv(4096).decode()
-            assert '{"test":1}' in data
-            reader.close()
+            if out_path:
+                reader = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                reader.settimeout(5.0)
+                reader.connect(out_path)
+                mgr.accept_pending()
+
+            with capture_stdout() as mock_stdout:
+                mgr.write(b'{"test":1}\n')
+                expected = b'{"test":1}\n' if expect_stdout else b""
+                assert mock_stdout.buffer.getvalue() == expected
+
+            if reader:
+                assert reader.recv(4096) == b'{"test":1}\n'
         finally:
+            if reader:
+                reader.close()
             mgr.cleanup()
 
-    def test_tee_mode(self) -> None:
-        """With --tee, writes to both stdout and output socket."""
+    def test_slow_reader_is_queued_not_dropped(self) -> None:
+        """A reader with a full buffer gets a send queue; others are unaffected."""
         out_path = make_temp_socket_path()
-        mgr = OutputManager(out_path, tee=True)
+        mgr = OutputManager(out_path, tee=False)
+        selector = selectors.DefaultSelector()
         try:
-            reader = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            reader.connect(out_path)
+            mgr.attach(selector)
+            slow = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            slow.connect(out_path)
+            fast = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            fast.connect(out_path)
             mgr.accept_pending()
 
-            with patch("sys.stdout", new_callable=io.StringIO) as mock_stdout:
-                mgr.write('{"test":1}\n')
-                assert mock_stdout.getvalue() == '{"test":1}\n'
-
-            data = reader.recv(4096).decode()
-            assert '{"test":1}' in data
-            reader.close()
+            line = b"x" * 1023 + b"\n"
+            count = 2000  # ~2 MB: more than the reader's socket buffers hold
+            fast_data = bytearray()
+            fast.setblocking(False)
+            for _ in range(count):
+                mgr.write(line)
+                try:
+                    fast_data += fast.recv(1 << 20)
+                except BlockingIOError:
+                    pass
+            # The slow reader's leftovers are queued, waiting for EVENT_WRITE
+            assert any(
+                key.events & selectors.EVENT_WRITE for key in selector.get_map().values()
+            )
+
+            # Drain the slow reader while running the event loop by hand
+            slow_data = bytearray()
+            slow.settimeout(0.05)
+            fast.settimeout(0.05)
+            for _ in range(1000):
+                if len(slow_data) == len(fast_data) == count * len(line):
+                    break
+                for key, _ in selector.select(0):
+                    key.data()
+                for sock, buf in ((slow, slow_data), (fast, fast_data)):
+                    try:
+                        buf += sock.recv(1 << 20)
+                    except TimeoutError:
+                        pass
+            assert slow_data == line * count
+            assert fast_data == line * count
+            slow.close()
+            fast.close()
         finally:
+            mgr.attach(None)
+            selector.close()
             mgr.cleanup()
 
 
@@ -1,7 +1,7 @@
 #!/usr/bin/env -S uv run --script
 # /// script
 # requires-python = ">=3.10"
-# dependencies = ["pytest", "pyyaml", "pygments"]
+# dependencies = ["pytest", "pyyaml", "pygments", "orjson"]
 # ///
 """
 Claude Code Hooks Observatory (Unix Socket, Selectors) - Tests
@@ -16,80 +16,125 @@ Usage:
 
 from __future__ import annotations
 
+import http.client
+import itertools
 import json
 import os
+import queue
+import select
 import socket
 import subprocess
 import sys
 import tempfile
 import time
-from typing import Generator
+from datetime import datetime, timezone
+from threading import Thread
+from typing import Any, Generator
 
 import pytest
 
 # Also import shared functions for unit testing
 sys.path.insert(0, os.path.dirname(__file__))
 from server_selectors import (
+    accept_all,
     parse_http_request,
+    parse_event,
+    parse_body,
     build_http_response,
     enrich_payload,
     get_peer_creds,
     get_socket_path,
     get_timestamp,
+    BODY_MAX,
     DEFAULT_SOCKET,
     ENV_SOCKET,
 )
 
 
-def make_temp_socket_path() -> str:
-    """Create a temporary path for a Unix socket."""
-    return tempfile.mktemp(suffix=".sock", prefix="test-selectors-")
+# (process, input socket path, queue of stdout lines)
+ServerProcess = tuple[subprocess.Popen, str, "queue.Queue[bytes]"]
 
 
-def make_request(socket_path: str, method: str, path: str, body: str = "") -> tuple[int, str]:
-    """Make an HTTP request over a Unix socket."""
-    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-    sock.settimeout(5.0)
-    sock.connect(socket_path)
+def pump_lines(stream: Any, lines: queue.Queue[bytes]) -> None:
+    """Copy lines from a subprocess pipe into a queue until EOF."""
+    for line in iter(stream.readline, b""):
+        lines.put(line)
 
-    request = f"{method} {path} HTTP/1.1\r\n"
-    request += "Host: localhost\r\n"
-    if body:
-        request += "Content-Type: application/json\r\n"
-        request += f"Content-Length: {len(body)}\r\n"
-    request += "\r\n"
-    request += body
 
-    sock.sendall(request.encode())
+def next_event_with(lines: queue.Queue[bytes], marker: bytes) -> dict[str, Any]:
+    """Return the next output event whose raw line contains `marker`.
 
-    response = b""
+    Lines left by earlier tests are skipped on a bytes search, so only the
+    matching line is parsed.
+    """
     while True:
-        try:
-            chunk = sock.recv(4096)
-        except socket.timeout:
-            break
-        if not chunk:
-            break
-        response += chunk
-        if b"\r\n\r\n" in response:
-            header_end = response.index(b"\r\n\r\n")
-            headers = response[:header_end].decode()
-            content_length = 0
-            for line in headers.split("\r\n"):
-                if line.lower().startswith("content-length:"):
-                    content_length = int(line.split(":")[1].strip())
-            body_start = header_end + 4
-            if len(response) >= body_start + content_length:
-                break
-
-    sock.close()
-
-    status_line = response.split(b"\r\n")[0].decode()
-    status_code = int(status_line.split(" ")[1])
-    body_start = response.index(b"\r\n\r\n") + 4
-    response_body = response[body_start:].decode()
-
-    return status_code, response_body
+        line = lines.get(timeout=2.0)
+        if marker in line:
+            return json.loads(line)
+
+
+_socket_ids = itertools.count()
+
+
+def make_temp_socket_path() -> str:
+    """Return a fresh path for a Unix socket (unique per process and call)."""
+    path = os.path.join(
+        tempfile.gettempdir(), f"test-selectors-{os.getpid()}-{next(_socket_ids)}.sock"
+    )
+    try:
+        os.unlink(path)  # left over from an earlier process with our pid
+    except FileNotFoundError:
+        pass
+    return path
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """http.client connection that dials a Unix socket instead of host:port.
+
+    Only connect() changes; request framing and response parsing are
+    stock http.client.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 5.0) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+# http.client only reads this mapping, so one instance serves every request.
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def json_payload(data: dict[str, Any]) -> bytes:
+    """Encode a test payload once, as the bytes send_request sends as-is."""
+    return json.dumps(data).encode()
+
+
+def send_request(
+    conn: UnixHTTPConnection, method: str, path: str, body: str | bytes = b""
+) -> tuple[int, str]:
+    """Send one request on an open connection; return (status, body text)."""
+    if isinstance(body, str):
+        body = body.encode()  # http.client would encode str as Latin-1
+    headers = JSON_HEADERS if body else {}
+    conn.request(method, path, body=body or None, headers=headers)
+    response = conn.getresponse()
+    return response.status, response.read().decode()
+
+
+def make_request(
+    socket_path: str, method: str, path: str, body: str | bytes = b""
+) -> tuple[int, str]:
+    """Make an HTTP request on a fresh Unix socket connection."""
+    conn = UnixHTTPConnection(socket_path)
+    try:
+        return send_request(conn, method, path, body)
+    finally:
+        conn.close()
 
 
 class TestParseHttpRequest:
@@ -107,9 +152,9 @@ class TestParseHttpRequest:
         method, path, body, headers = parse_http_request(raw)
         assert method == "POST"
         assert path == "/hook?event=PreToolUse"
-        assert body == '{"tool_name": "Bash"}'
-        assert headers["content-type"] == "application/json"
-        assert headers["content-length"] == "21"
+        assert body == b'{"tool_name": "Bash"}'
+        assert headers[b"content-type"] == b"application/json"
+        assert headers[b"content-length"] == b"21"
 
     def test_parses_get_request(self) -> None:
         """Correctly parses a GET request."""
@@ -117,14 +162,54 @@ class TestParseHttpRequest:
         method, path, body, headers = parse_http_request(raw)
         assert method == "GET"
         assert path == "/health"
-        assert body == ""
+        assert body == b""
 
     def test_handles_empty_body(self) -> None:
         """POST with no body."""
         raw = b"POST /hook?event=Stop HTTP/1.1\r\nContent-Length: 0\r\n\r\n"
         method, path, body, headers = parse_http_request(raw)
         assert method == "POST"
-        assert body == ""
+        assert body == b""
+
+    def test_header_spacing_and_case(self) -> None:
+        """Header names are lowercased; any spaces/tabs after the colon are skipped."""
+        raw = (
+            b"POST /hook HTTP/1.1\r\n"
+            b"CONTENT-LENGTH:2\r\n"
+            b"X-Tab:\tvalue\r\n"
+            b"\r\n"
+            b"{}"
+        )
+        _, _, body, headers = parse_http_request(raw)
+        assert headers == {b"content-length": b"2", b"x-tab": b"value"}
+        assert body == b"{}"
+
+    def test_parse_event(self) -> None:
+        """event= is sliced from the query string, defaulting to 'Unknown'."""
+        assert parse_event("/hook?event=PreToolUse") == "PreToolUse"
+        assert parse_event("/hook?x=1&event=My%20Event&y=2") == "My Event"
+        assert parse_event("/hook?myevent=Stop") == "Unknown"
+        assert parse_event("/hook") == "Unknown"
+
+
+class TestParseBody:
+    """Test hook body decoding."""
+
+    def test_object_and_empty(self) -> None:
+        """A JSON object body becomes the payload; an empty body is {}."""
+        assert parse_body(b'{"a": 1}') == {"a": 1}
+        assert parse_body(b"") == {}
+
+    def test_non_object_kept_raw(self) -> None:
+        """Invalid JSON and non-object JSON are kept as text under _raw."""
+        assert parse_body(b"not json") == {"_raw": "not json"}
+        assert parse_body(b"[1, 2]") == {"_raw": "[1, 2]"}
+        assert parse_body(b"{bad") == {"_raw": "{bad"}
+
+    def test_invalid_utf8_kept_raw(self) -> None:
+        """Bytes that aren't UTF-8 are kept under _raw, with or without orjson."""
+        assert parse_body(b"\xff") == {"_raw": "\ufffd"}
+        assert parse_body(b'{"a": "\xff"}') == {"_raw": '{"a": "\ufffd"}'}
 
 
 class TestBuildHttpResponse:
@@ -161,54 +246,104 @@ class TestEnrichPayload:
         result = enrich_payload({}, "TestEvent", (1234, 1000, 1000))
         assert result["_peer_pid"] == 1234
 
+    def test_timestamp_matches_datetime_isoformat(self) -> None:
+        """Cached timestamp has the same shape as datetime's isoformat()."""
+        before = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        ts = get_timestamp()
+        after = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        assert before <= ts <= after
+
 
 class TestSocketConfiguration:
-    """Test socket path precedence."""
+    """Test socket path precedence: CLI > env > default."""
+
+    @pytest.mark.parametrize(
+        ("env", "cli", "expected"),
+        [
+            ({}, None, DEFAULT_SOCKET),
+            ({ENV_SOCKET: "/tmp/custom.sock"}, None, "/tmp/custom.sock"),
+            ({ENV_SOCKET: "/tmp/env.sock"}, "/tmp/cli.sock", "/tmp/cli.sock"),
+        ],
+        ids=["default", "env_overrides_default", "cli_overrides_env"],
+    )
+    def test_socket_precedence(
+        self,
+        monkeypatch: pytest.MonkeyPatch,
+        env: dict[str, str],
+        cli: str | None,
+        expected: str,
+    ) -> None:
+        monkeypatch.delenv(ENV_SOCKET, raising=False)
+        for key, value in env.items():
+            monkeypatch.setenv(key, value)
+        assert get_socket_path(cli) == expected
 
-    def test_default(self) -> None:
-        with patch_env_clear():
-            assert get_socket_path(None) == DEFAULT_SOCKET
 
-    def test_env_override(self) -> None:
-        os.environ[ENV_SOCKET] = "/tmp/env-test.sock"
-        try:
-            assert get_socket_path(None) == "/tmp/env-test.sock"
-        finally:
-            del os.environ[ENV_SOCKET]
+class TestAcceptAll:
+    """Test draining a listener's accept queue."""
 
-    def test_cli_override(self) -> None:
-        os.environ[ENV_SOCKET] = "/tmp/env-test.sock"
+    def test_accepts_every_queued_connection(self) -> None:
+        """All pending connections come back from one call, then none."""
+        path = make_temp_socket_path()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.setblocking(False)
+        listener.bind(path)
+        listener.listen(8)
+        clients = [socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) for _ in range(3)]
         try:
-            assert get_socket_path("/tmp/cli.sock") == "/tmp/cli.sock"
+            for c in clients:
+                c.connect(path)
+            conns = accept_all(listener)
+            assert len(conns) == 3
+            assert accept_all(listener) == []
+            for conn in conns:
+                conn.close()
         finally:
-            del os.environ[ENV_SOCKET]
+            for c in clients:
+                c.close()
+            listener.close()
+            os.unlink(path)
 
 
 class TestSelectorsServerIntegration:
     """Integration tests running the selectors server as a subprocess."""
 
-    @pytest.fixture
-    def server_process(self) -> Generator[tuple[subprocess.Popen, str], None, None]:
-        """Start the selectors server as a subprocess."""
+    @pytest.fixture(scope="module")
+    def server_process(self) -> Generator[ServerProcess, None, None]:
+        """Start one selectors server subprocess for the whole class.
+
+        A daemon thread copies its stdout lines into a queue, so tests can
+        read output without terminating the process (and the pipe never
+        fills up and blocks the server).
+        """
         path = make_temp_socket_path()
         server_script = os.path.join(os.path.dirname(__file__), "server_selectors.py")
 
+        # The test script's own dependencies cover the server's, so run it
+        # with this interpreter instead of paying for `uv run` resolution.
         proc = subprocess.Popen(
-            ["uv", "run", "--script", server_script, "--socket", path],
+            [sys.executable, server_script, "--socket", path],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
         )
-
-        # Wait for socket file to appear
-        for _ in range(50):
-            if os.path.exists(path):
-                break
-            time.sleep(0.1)
-        else:
-            proc.kill()
-            pytest.fail("Server socket did not appear within 5 seconds")
-
-        yield proc, path
+        lines: queue.Queue[bytes] = queue.Queue()
+        Thread(target=pump_lines, args=(proc.stdout, lines), daemon=True).start()
+
+        # The server reports "listening on" (stderr) right after listen(),
+        # so block on that instead of polling for the socket file.
+        err = b""
+        deadline = time.monotonic() + 5.0
+        while b"listening on" not in err:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([proc.stderr], [], [], remaining)[0]:
+                proc.kill()
+                pytest.fail("Server did not start listening within 5 seconds")
+            chunk = os.read(proc.stderr.fileno(), 4096)  # type: ignore[union-attr]
+            if not chunk:
+                pytest.fail(f"Server exited before listening: {err.decode()}")
+            err += chunk
+
+        yield proc, path, lines
 
         proc.terminate()
         try:
@@ -218,71 +353,143 @@ class TestSelectorsServerIntegration:
         if os.path.exists(path):
             os.unlink(path)
 
-    def test_hook_returns_200(
-        self, server_process: tuple[subprocess.Popen, str]
-    ) -> None:
-        """POST /hook returns 200 (no-op)."""
-        _, path = server_process
-        payload = json.dumps({"tool_name": "Bash"})
-        status, body = make_request(path, "POST", "/hook?event=PreToolUse", payload)
-        assert status == 200
-        assert body == ""
+    @pytest.fixture(scope="module")
+    def conn(self, server_process: ServerProcess) -> Generator[UnixHTTPConnection, None, None]:
+        """One keep-alive connection to the shared server, reused across tests."""
+        _, path, _ = server_process
+        conn = UnixHTTPConnection(path)
+        yield conn
+        conn.close()
+
+    def test_hook_returns_200(self, conn: UnixHTTPConnection) -> None:
+        """POST /hook returns 200 (no-op), and the connection is kept alive."""
+        payload = json_payload({"tool_name": "Bash"})
+        socks = set()
+        for _ in range(2):
+            status, body = send_request(conn, "POST", "/hook?event=PreToolUse", payload)
+            assert status == 200
+            assert body == ""
+            socks.add(conn.sock)
+        assert len(socks) == 1  # never reconnected
 
     def test_health_returns_ok(
-        self, server_process: tuple[subprocess.Popen, str]
+        self, server_process: ServerProcess
     ) -> None:
         """GET /health returns status ok."""
-        _, path = server_process
+        _, path, _ = server_process
         status, body = make_request(path, "GET", "/health")
         assert status == 200
         assert json.loads(body) == {"status": "ok"}
 
     def test_outputs_enriched_jsonl(
-        self, server_process: tuple[subprocess.Popen, str]
+        self, server_process: ServerProcess
     ) -> None:
         """Server outputs enriched JSONL to stdout."""
-        proc, path = server_process
-        payload = json.dumps({"tool_name": "Edit"})
+        _, path, lines = server_process
+        payload = json_payload({"tool_name": "Edit"})
         make_request(path, "POST", "/hook?event=PostToolUse", payload)
 
-        # Give server a moment to flush stdout
-        time.sleep(0.2)
-
-        # Terminate and read stdout
-        proc.terminate()
-        stdout, _ = proc.communicate(timeout=5)
-
-        # Should contain enriched JSONL
-        lines = stdout.decode().strip().split("\n")
-        assert len(lines) >= 1
-        event = json.loads(lines[0])
+        event = next_event_with(lines, b'"Edit"')
         assert event["_event"] == "PostToolUse"
         assert event["tool_name"] == "Edit"
         assert "_ts" in event
 
-    def test_multiple_events(
-        self, server_process: tuple[subprocess.Popen, str]
-    ) -> None:
-        """Server handles multiple sequential requests."""
-        _, path = server_process
+    def test_multiple_events(self, server_process: ServerProcess) -> None:
+        """Pipelined POSTs on one connection are answered and emitted in order."""
+        _, path, lines = server_process
         events = ["SessionStart", "PreToolUse", "PostToolUse", "SessionEnd"]
+        requests = []
         for event in events:
-            payload = json.dumps({"event_data": event})
-            status, _ = make_request(path, "POST", f"/hook?event={event}", payload)
-            assert status == 200
-
-
-# Helper for clearing env
-from contextlib import contextmanager
-
-@contextmanager
-def patch_env_clear():
-    old = os.environ.pop(ENV_SOCKET, None)
-    try:
-        yield
-    finally:
-        if old is not None:
-            os.environ[ENV_SOCKET] = old
+            body = b'{"event_data":"%s"}' % event.encode()
+            requests.append(
+                b"POST /hook?event=%s HTTP/1.1\r\n"
+                b"Content-Length: %d\r\n\r\n%s" % (event.encode(), len(body), body)
+            )
+        requests.append(b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5.0)
+            sock.connect(path)
+            sock.sendall(b"".join(requests))  # one write, one connect
+            response = b""
+            while chunk := sock.recv(4096):
+                response += chunk
+        assert response.count(b"HTTP/1.1 200 OK") == len(events) + 1
+
+        # The burst is emitted in order, right after its first event
+        assert next_event_with(lines, b'"SessionStart"')["event_data"] == events[0]
+        for event in events[1:]:
+            assert json.loads(lines.get(timeout=2.0))["event_data"] == event
+
+    def test_pipelined_404_keeps_connection(
+        self, server_process: ServerProcess
+    ) -> None:
+        """A 404 mid-pipeline is answered in order and the next request still runs."""
+        _, path, _ = server_process
+        body = b'{"tool_name":"Bash"}'
+        request = (
+            b"POST /hook?event=PreToolUse HTTP/1.1\r\n"
+            b"Content-Length: %d\r\n\r\n%s" % (len(body), body)
+        )
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5.0)
+            sock.connect(path)
+            sock.sendall(
+                request
+                + b"GET /missing HTTP/1.1\r\n\r\n"
+                + b"GET /health HTTP/1.1\r\nConnection: close\r\n\r\n"
+            )
+            response = b""
+            while chunk := sock.recv(4096):
+                response += chunk
+        ok, not_found = b"HTTP/1.1 200 OK", b"HTTP/1.1 404 Not Found"
+        assert response.count(ok) == 2
+        assert response.find(ok) < response.find(not_found) < response.rfind(ok)
+        assert response.endswith(b'{"status": "ok"}')
+
+    @pytest.mark.parametrize(
+        ("request_bytes", "status_line"),
+        [
+            (b"POST /hook?event=Stop HTTP/1.0\r\nContent-Length: 2\r\n\r\n{}",
+             b"HTTP/1.1 200 OK"),
+            (b"GET /missing HTTP/1.0\r\n\r\n", b"HTTP/1.1 404 Not Found"),
+        ],
+        ids=["post", "not_found"],
+    )
+    def test_http10_closes_after_response(
+        self, server_process: ServerProcess, request_bytes: bytes, status_line: bytes
+    ) -> None:
+        """HTTP/1.0 without keep-alive: one response, then the server hangs up."""
+        _, path, _ = server_process
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5.0)
+            sock.connect(path)
+            sock.sendall(request_bytes)
+            response = b""
+            while chunk := sock.recv(4096):  # EOF, not the 5 s timeout
+                response += chunk
+        assert response.startswith(status_line)
+        assert response.count(b"HTTP/1.1 ") == 1
+
+    @pytest.mark.parametrize(
+        "content_length",
+        [b"-1000", b"abc", b"%d" % (BODY_MAX + 1)],
+        ids=["negative", "not_a_number", "over_body_max"],
+    )
+    def test_bad_content_length_closes_connection(
+        self, server_process: ServerProcess, content_length: bytes
+    ) -> None:
+        """A request with an unusable Content-Length is refused, not looped on."""
+        _, path, _ = server_process
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(5.0)
+            sock.connect(path)
+            sock.sendall(
+                b"POST /hook?event=PreToolUse HTTP/1.1\r\n"
+                b"Content-Length: %s\r\n\r\n{}" % content_length
+            )
+            assert sock.recv(4096) == b""  # closed without a response
+        status, _ = make_request(path, "GET", "/health")
+        assert status == 200
 
 
 if __name__ == "__main__":